@@ -9,7 +9,7 @@ import zipfile
 
 import bpy
 import bpy.utils.previews
-from bpy_extras.io_utils import ImportHelper
+from bpy_extras.io_utils import ExportHelper, ImportHelper
 
 
 def _add_bundled_wheels_to_sys_path() -> None:
@@ -67,10 +67,15 @@ def _ensure_required_module_available(module_name: str) -> None:
 _add_bundled_wheels_to_sys_path()
 _ensure_required_module_available("pydicom")
 
-from .ct import load_ct_series
-from .dose import load_dose
+from .ct import load_all_ct_series, load_ct_series
+from .dicom_util import read_dicom_header
+from .dose import load_dose, load_isodose_surfaces, load_plan_sum
+from .dvh import compute_structure_dvhs, dvh_metrics, write_dvh_csv
+from .gamma import load_gamma
+from .pencil_beam import load_pencil_beam_dose
 from .plan import load_proton_plan
-from .structure import load_structures
+from .structure import list_structure_rois, load_structures, roi_name_matches
+from .volume_utils import restore_viewport_lods, set_viewport_lod, use_render_lods
 
 
 bl_info = {
@@ -84,6 +89,21 @@ bl_info = {
 }
 
 
+_WINDOW_PRESET_ITEMS = (
+    ("FULL", "Full Range", "Display window spanning the exact min/max of the series"),
+    ("AUTO", "Auto", "Window from the 0.5-99.5 percentile band of a sampled histogram"),
+    ("SOFT_TISSUE", "Soft Tissue", "CT window W400 L40 (falls back to Auto for MR)"),
+    ("LUNG", "Lung", "CT window W1500 L-600 (falls back to Auto for MR)"),
+    ("BONE", "Bone", "CT window W1800 L400 (falls back to Auto for MR)"),
+)
+
+_VOXEL_FORMAT_ITEMS = (
+    ("FLOAT32", "Float (32-bit)", "Full precision float volume"),
+    ("HALF", "Half Float", "16-bit float volume, stored as half floats in the VDB file"),
+    ("INT16", "16-bit Integer", "Whole modality units (HU) in int16 while importing, saved as half floats in the VDB file"),
+)
+
+
 addon_keymaps = {}
 _icons = None
 
@@ -93,6 +113,71 @@ def _get_prefs(context) -> bpy.types.AddonPreferences | None:
     return addon.preferences if addon else None
 
 
+class MEDBLEND_ROI_Preset(bpy.types.PropertyGroup):
+    pattern: bpy.props.StringProperty(name="Pattern", description="ROI name filter saved in this preset")
+    use_regex: bpy.props.BoolProperty(name="Regex", description="Treat the pattern as a regular expression")
+
+
+class MEDBLEND_ROI_Item(bpy.types.PropertyGroup):
+    roi_number: bpy.props.IntProperty(name="ROI Number")
+    roi_type: bpy.props.StringProperty(name="Type")
+    contour_count: bpy.props.IntProperty(name="Contours")
+    point_count: bpy.props.IntProperty(name="Points")
+    selected: bpy.props.BoolProperty(name="Import", description="Rasterise and import this ROI", default=False)
+
+
+class MEDBLEND_ROI_Picker(bpy.types.PropertyGroup):
+    filepath: bpy.props.StringProperty(name="Structure Set", subtype="FILE_PATH")
+    rois: bpy.props.CollectionProperty(type=MEDBLEND_ROI_Item)
+    active_index: bpy.props.IntProperty()
+    name_filter: bpy.props.StringProperty(
+        name="Filter",
+        description="Comma-separated name fragments (or a regular expression) used by Select Matching",
+    )
+    use_regex: bpy.props.BoolProperty(name="Regex", description="Treat the filter as a regular expression")
+
+
+class MEDBLEND_DVH_Row(bpy.types.PropertyGroup):
+    volume_cc: bpy.props.FloatProperty(name="Volume (cc)")
+    mean_dose: bpy.props.FloatProperty(name="Dmean")
+    min_dose: bpy.props.FloatProperty(name="Dmin")
+    max_dose: bpy.props.FloatProperty(name="Dmax")
+    d_metric: bpy.props.FloatProperty(name="Dx")
+    v_metric: bpy.props.FloatProperty(name="Vx")
+
+
+class MEDBLEND_DVH_Settings(bpy.types.PropertyGroup):
+    structure_path: bpy.props.StringProperty(name="Structure Set", subtype="FILE_PATH")
+    dose_path: bpy.props.StringProperty(name="Dose", subtype="FILE_PATH")
+    bin_width: bpy.props.FloatProperty(
+        name="Bin Width",
+        description="Dose bin width of the histograms, in the dose units (Gy)",
+        default=0.1,
+        min=0.001,
+        soft_max=1.0,
+    )
+    d_percent: bpy.props.FloatProperty(
+        name="Dx %",
+        description="Volume percentage x of the Dx column (minimum dose to the hottest x% of the ROI)",
+        default=95.0,
+        min=0.0,
+        max=100.0,
+    )
+    v_dose: bpy.props.FloatProperty(
+        name="Vx Dose",
+        description="Dose x of the Vx column (percentage of the ROI receiving at least x)",
+        default=20.0,
+        min=0.0,
+    )
+    use_roi_selection: bpy.props.BoolProperty(
+        name="Selected ROIs Only",
+        description="Only compute the ROIs selected in the ROI picker when it lists this structure set",
+        default=False,
+    )
+    rows: bpy.props.CollectionProperty(type=MEDBLEND_DVH_Row)
+    active_index: bpy.props.IntProperty()
+
+
 class MEDBLEND_Preferences(bpy.types.AddonPreferences):
     bl_idname = __package__
 
@@ -102,6 +187,7 @@ class MEDBLEND_Preferences(bpy.types.AddonPreferences):
         subtype="DIR_PATH",
         default="",
     )
+    roi_presets: bpy.props.CollectionProperty(type=MEDBLEND_ROI_Preset)
 
     def draw(self, _context):
         layout = self.layout
@@ -119,12 +205,57 @@ class SNA_PT_MEDBLEND_70A7C(bpy.types.Panel):
         layout = self.layout
         layout.label(text="Images")
         layout.operator("medblend.load_ct", text="Load DICOM Images", icon="FILEBROWSER")
+        layout.operator("medblend.load_all_series", text="Load Image Series (Batch)", icon="FILEBROWSER")
         layout.label(text="Dose")
         layout.operator("medblend.load_dose", text="Load DICOM Dose", icon="FILEBROWSER")
+        layout.operator("medblend.load_plan_sum", text="Load Plan Sum", icon="FILEBROWSER")
+        layout.operator("medblend.load_isodose", text="Load Isodose Surfaces", icon="FILEBROWSER")
+        layout.operator("medblend.load_gamma", text="Gamma Comparison", icon="MOD_DATA_TRANSFER")
         layout.label(text="Structures")
         layout.operator("medblend.load_structures", text="Load DICOM Structures", icon="FILEBROWSER")
+        layout.operator("medblend.list_structure_rois", text="Pick ROIs", icon="VIEWZOOM")
+        picker = _context.scene.medblend_roi_picker
+        if picker.rois:
+            layout.template_list("MEDBLEND_UL_ROIs", "", picker, "rois", picker, "active_index", rows=6)
+            row = layout.row(align=True)
+            row.prop(picker, "name_filter", text="")
+            row.prop(picker, "use_regex", text="", icon="SCRIPT")
+            row = layout.row(align=True)
+            row.operator("medblend.select_rois", text="Select Matching").action = "MATCHING"
+            row.operator("medblend.select_rois", text="All").action = "ALL"
+            row.operator("medblend.select_rois", text="None").action = "NONE"
+            prefs = _get_prefs(_context)
+            if prefs:
+                for index, preset in enumerate(prefs.roi_presets):
+                    row = layout.row(align=True)
+                    row.operator("medblend.apply_roi_preset", text=preset.name).preset_index = index
+                    row.operator("medblend.remove_roi_preset", text="", icon="X").preset_index = index
+                layout.operator("medblend.save_roi_preset", text="Save Filter as Preset", icon="ADD")
+            row = layout.row()
+            # Import straight away with the stored path instead of opening the file browser.
+            row.operator_context = "EXEC_DEFAULT"
+            import_op = row.operator("medblend.load_structures", text="Import Selected ROIs", icon="IMPORT")
+            import_op.use_roi_selection = True
+        layout.label(text="Dose-Volume Histograms")
+        dvh_settings = _context.scene.medblend_dvh
+        layout.prop(dvh_settings, "structure_path")
+        layout.prop(dvh_settings, "dose_path")
+        row = layout.row(align=True)
+        row.prop(dvh_settings, "bin_width")
+        row.prop(dvh_settings, "d_percent")
+        row.prop(dvh_settings, "v_dose")
+        layout.prop(dvh_settings, "use_roi_selection")
+        layout.operator("medblend.compute_dvh", text="Compute DVHs", icon="GRAPH")
+        if dvh_settings.rows:
+            layout.template_list("MEDBLEND_UL_DVH", "", dvh_settings, "rows", dvh_settings, "active_index", rows=6)
+            layout.operator("medblend.export_dvh_csv", text="Export DVH CSV", icon="EXPORT")
         layout.label(text="Proton Spots")
         layout.operator("medblend.load_proton", text="Load Proton Plan", icon="FILEBROWSER")
+        layout.operator("medblend.compute_proton_dose", text="Compute Proton Dose", icon="FILEBROWSER")
+        layout.label(text="Viewport Level of Detail")
+        row = layout.row(align=True)
+        for level, label in enumerate(("Full", "1/2", "1/4", "1/8")):
+            row.operator("medblend.set_viewport_lod", text=label).level = level
         layout.separator()
         layout.label(text="VDB Temp Directory")
         prefs = _get_prefs(_context)
@@ -173,15 +304,386 @@ class MEDBLEND_OT_Clear_Vdb_Temp_Dir(bpy.types.Operator):
         return {"FINISHED"}
 
 
+class MEDBLEND_OT_Set_Viewport_Lod(bpy.types.Operator):
+    bl_idname = "medblend.set_viewport_lod"
+    bl_label = "Set Viewport LOD"
+    bl_description = "Show a lower resolution copy of the selected volumes in the viewport; renders always use full resolution"
+    bl_options = {"REGISTER", "UNDO"}
+
+    level: bpy.props.IntProperty(
+        name="Level",
+        description="0 is full resolution, each level halves it",
+        default=0,
+        min=0,
+        max=3,
+    )
+
+    def execute(self, context):
+        switched = [obj for obj in context.selected_objects if set_viewport_lod(obj, self.level)]
+        if not switched:
+            self.report({"WARNING"}, "No selected volume was imported with viewport LOD levels")
+            return {"CANCELLED"}
+        return {"FINISHED"}
+
+
+class MEDBLEND_UL_ROIs(bpy.types.UIList):
+    def draw_item(self, _context, layout, _data, item, _icon, _active_data, _active_property, _index):
+        row = layout.row(align=True)
+        row.prop(item, "selected", text="")
+        row.label(text=item.name)
+        row.label(text=item.roi_type)
+        row.label(text=f"{item.contour_count} / {item.point_count} pts")
+
+
+class MEDBLEND_OT_List_Structure_Rois(bpy.types.Operator, ImportHelper):
+    bl_idname = "medblend.list_structure_rois"
+    bl_label = "Pick ROIs"
+    bl_description = "List the ROIs of a DICOM Structure Set from its header so a subset can be imported"
+    filter_glob: bpy.props.StringProperty(default="*", options={"HIDDEN"})
+
+    def execute(self, context):
+        try:
+            rois = list_structure_rois(Path(self.filepath))
+        except Exception as exc:
+            self.report({"ERROR"}, f"Unable to read structure set: {exc}")
+            return {"CANCELLED"}
+
+        picker = context.scene.medblend_roi_picker
+        picker.filepath = self.filepath
+        picker.rois.clear()
+        for roi in rois:
+            item = picker.rois.add()
+            item.name = roi["name"]
+            item.roi_number = roi["number"]
+            item.roi_type = roi["type"]
+            item.contour_count = roi["contours"]
+            item.point_count = roi["points"]
+        picker.active_index = 0
+        return {"FINISHED"}
+
+
+def _select_matching_rois(picker) -> int:
+    selected = 0
+    for item in picker.rois:
+        item.selected = roi_name_matches(item.name, picker.name_filter, picker.use_regex)
+        selected += int(item.selected)
+    return selected
+
+
+class MEDBLEND_OT_Select_Rois(bpy.types.Operator):
+    bl_idname = "medblend.select_rois"
+    bl_label = "Select ROIs"
+    bl_description = "Select listed ROIs by name filter, or all/none"
+    bl_options = {"REGISTER", "UNDO"}
+
+    action: bpy.props.EnumProperty(
+        name="Action",
+        items=(
+            ("MATCHING", "Matching", "Select exactly the ROIs matching the filter"),
+            ("ALL", "All", "Select every ROI"),
+            ("NONE", "None", "Deselect every ROI"),
+        ),
+        default="MATCHING",
+    )
+
+    def execute(self, context):
+        picker = context.scene.medblend_roi_picker
+        if self.action == "MATCHING":
+            _select_matching_rois(picker)
+        else:
+            for item in picker.rois:
+                item.selected = self.action == "ALL"
+        return {"FINISHED"}
+
+
+class MEDBLEND_OT_Save_Roi_Preset(bpy.types.Operator):
+    bl_idname = "medblend.save_roi_preset"
+    bl_label = "Save ROI Preset"
+    bl_description = "Save the current ROI name filter as a preset in the add-on preferences"
+
+    preset_name: bpy.props.StringProperty(name="Name", default="ROI Preset")
+
+    def execute(self, context):
+        prefs = _get_prefs(context)
+        picker = context.scene.medblend_roi_picker
+        if not prefs or not picker.name_filter:
+            return {"CANCELLED"}
+        preset = next((preset for preset in prefs.roi_presets if preset.name == self.preset_name), None)
+        if preset is None:
+            preset = prefs.roi_presets.add()
+            preset.name = self.preset_name
+        preset.pattern = picker.name_filter
+        preset.use_regex = picker.use_regex
+        context.preferences.is_dirty = True
+        return {"FINISHED"}
+
+    def invoke(self, context, _event):
+        return context.window_manager.invoke_props_dialog(self)
+
+
+class MEDBLEND_OT_Apply_Roi_Preset(bpy.types.Operator):
+    bl_idname = "medblend.apply_roi_preset"
+    bl_label = "Apply ROI Preset"
+    bl_description = "Load the preset's filter and select the matching ROIs"
+    bl_options = {"REGISTER", "UNDO"}
+
+    preset_index: bpy.props.IntProperty(options={"HIDDEN"})
+
+    def execute(self, context):
+        prefs = _get_prefs(context)
+        if not prefs or not 0 <= self.preset_index < len(prefs.roi_presets):
+            return {"CANCELLED"}
+        preset = prefs.roi_presets[self.preset_index]
+        picker = context.scene.medblend_roi_picker
+        picker.name_filter = preset.pattern
+        picker.use_regex = preset.use_regex
+        _select_matching_rois(picker)
+        return {"FINISHED"}
+
+
+class MEDBLEND_OT_Remove_Roi_Preset(bpy.types.Operator):
+    bl_idname = "medblend.remove_roi_preset"
+    bl_label = "Remove ROI Preset"
+    bl_description = "Delete this ROI preset"
+
+    preset_index: bpy.props.IntProperty(options={"HIDDEN"})
+
+    def execute(self, context):
+        prefs = _get_prefs(context)
+        if not prefs or not 0 <= self.preset_index < len(prefs.roi_presets):
+            return {"CANCELLED"}
+        prefs.roi_presets.remove(self.preset_index)
+        context.preferences.is_dirty = True
+        return {"FINISHED"}
+
+
+def _dvh_roi_numbers(context, settings):
+    if not settings.use_roi_selection:
+        return None
+    picker = context.scene.medblend_roi_picker
+    if bpy.path.abspath(picker.filepath) != bpy.path.abspath(settings.structure_path):
+        return None
+    return [item.roi_number for item in picker.rois if item.selected]
+
+
+def _compute_dvh_settings(context, settings):
+    return compute_structure_dvhs(
+        Path(bpy.path.abspath(settings.structure_path)),
+        Path(bpy.path.abspath(settings.dose_path)),
+        bin_width=settings.bin_width,
+        roi_numbers=_dvh_roi_numbers(context, settings),
+    )
+
+
+class MEDBLEND_UL_DVH(bpy.types.UIList):
+    def draw_item(self, _context, layout, _data, item, _icon, _active_data, _active_property, _index):
+        row = layout.row(align=True)
+        row.label(text=item.name)
+        row.label(text=f"{item.volume_cc:.1f} cc")
+        row.label(text=f"mean {item.mean_dose:.2f}")
+        row.label(text=f"Dx {item.d_metric:.2f}")
+        row.label(text=f"Vx {item.v_metric:.1f}%")
+
+
+class MEDBLEND_OT_Compute_Dvh(bpy.types.Operator):
+    bl_idname = "medblend.compute_dvh"
+    bl_label = "Compute DVHs"
+    bl_description = "Compute dose-volume histograms and metrics for every ROI of the structure set against the dose"
+
+    def execute(self, context):
+        settings = context.scene.medblend_dvh
+        if not settings.structure_path or not settings.dose_path:
+            self.report({"WARNING"}, "Choose a structure set and a dose file first")
+            return {"CANCELLED"}
+        try:
+            names, dvh, voxel_volume_cc = _compute_dvh_settings(context, settings)
+        except Exception as exc:
+            self.report({"ERROR"}, f"Unable to compute DVHs: {exc}")
+            return {"CANCELLED"}
+
+        metrics = dvh_metrics(dvh, voxel_volume_cc, d_percents=(settings.d_percent,), v_doses=(settings.v_dose,))
+        d_column = f"D{settings.d_percent:g}"
+        v_column = f"V{settings.v_dose:g}"
+        settings.rows.clear()
+        for name, roi_metrics in zip(names, metrics):
+            row = settings.rows.add()
+            row.name = name
+            row.volume_cc = roi_metrics["Volume (cc)"]
+            row.mean_dose = roi_metrics["Dmean"]
+            row.min_dose = roi_metrics["Dmin"]
+            row.max_dose = roi_metrics["Dmax"]
+            row.d_metric = roi_metrics[d_column]
+            row.v_metric = roi_metrics[v_column]
+        settings.active_index = 0
+        return {"FINISHED"}
+
+
+class MEDBLEND_OT_Export_Dvh_Csv(bpy.types.Operator, ExportHelper):
+    bl_idname = "medblend.export_dvh_csv"
+    bl_label = "Export DVH CSV"
+    bl_description = "Write the DVH metrics and cumulative curves of every ROI to a CSV file"
+    filename_ext = ".csv"
+    filter_glob: bpy.props.StringProperty(default="*.csv", options={"HIDDEN"})
+    include_curves: bpy.props.BoolProperty(
+        name="Include Curves",
+        description="Append the cumulative DVH of every ROI (% volume per dose bin) after the metrics table",
+        default=True,
+    )
+
+    def execute(self, context):
+        settings = context.scene.medblend_dvh
+        try:
+            # ROI masks are cached, so this only re-bins the dose.
+            names, dvh, voxel_volume_cc = _compute_dvh_settings(context, settings)
+            metrics = dvh_metrics(
+                dvh,
+                voxel_volume_cc,
+                d_percents=sorted({98.0, 95.0, 50.0, 2.0, settings.d_percent}, reverse=True),
+                v_doses=(settings.v_dose,),
+            )
+            write_dvh_csv(Path(self.filepath), names, metrics, dvh if self.include_curves else None)
+        except Exception as exc:
+            self.report({"ERROR"}, f"Unable to export DVHs: {exc}")
+            return {"CANCELLED"}
+        return {"FINISHED"}
+
+
 class SNA_OT_Load_Ct_Fc7B9(bpy.types.Operator, ImportHelper):
     bl_idname = "medblend.load_ct"
     bl_label = "Load CT"
     bl_description = "Load a CT Dataset"
     bl_options = {"REGISTER", "UNDO"}
     filter_glob: bpy.props.StringProperty(default="*", options={"HIDDEN"})
+    use_streaming: bpy.props.BoolProperty(
+        name="Stream Slabs",
+        description="Read, rescale and write the series in slabs to bound memory use on very large series",
+        default=False,
+    )
+    slab_size: bpy.props.IntProperty(
+        name="Slab Size",
+        description="Number of slices decoded per slab when streaming",
+        default=64,
+        min=1,
+    )
+    window_preset: bpy.props.EnumProperty(
+        name="Window",
+        description="Display window applied by the Image Material; voxels keep their modality units (HU for CT)",
+        items=_WINDOW_PRESET_ITEMS,
+        default="FULL",
+    )
+    voxel_format: bpy.props.EnumProperty(
+        name="Voxel Format",
+        description="Voxel type held in memory while importing and written to the VDB file",
+        items=_VOXEL_FORMAT_ITEMS,
+        default="FLOAT32",
+    )
+    lod_levels: bpy.props.IntProperty(
+        name="Viewport LOD Levels",
+        description="Also write this many half-resolution copies (1/2, 1/4, 1/8) for a responsive viewport; renders use full resolution",
+        default=0,
+        min=0,
+        max=3,
+    )
+    use_sparse: bpy.props.BoolProperty(
+        name="Sparse Air Background",
+        description="Leave voxels close to air (CT) or the sampled minimum (MR) inactive to shrink memory, file size and render traversal",
+        default=False,
+    )
+    background_tolerance: bpy.props.FloatProperty(
+        name="Background Tolerance",
+        description="Voxels within this many modality units (HU for CT) of the background are left inactive",
+        default=50.0,
+        min=0.0,
+    )
+
+    def execute(self, _context):
+        slab_size = self.slab_size if self.use_streaming else None
+        success = load_ct_series(
+            Path(self.filepath),
+            slab_size=slab_size,
+            window_preset=self.window_preset,
+            voxel_format=self.voxel_format,
+            lod_levels=self.lod_levels,
+            background_tolerance=self.background_tolerance if self.use_sparse else None,
+        )
+        return {"FINISHED"} if success else {"CANCELLED"}
+
+
+class MEDBLEND_OT_Load_All_Series(bpy.types.Operator, ImportHelper):
+    bl_idname = "medblend.load_all_series"
+    bl_label = "Load Image Series"
+    bl_description = "Load several CT/MR series from one folder in a single pass"
+    bl_options = {"REGISTER", "UNDO"}
+    filter_glob: bpy.props.StringProperty(default="*", options={"HIDDEN"})
+    files: bpy.props.CollectionProperty(type=bpy.types.OperatorFileListElement, options={"HIDDEN", "SKIP_SAVE"})
+    directory: bpy.props.StringProperty(subtype="DIR_PATH", options={"HIDDEN"})
+    import_all: bpy.props.BoolProperty(
+        name="All Series in Folder",
+        description="Import every CT/MR series in the folder instead of only the series of the selected files",
+        default=True,
+    )
+    use_streaming: bpy.props.BoolProperty(
+        name="Stream Slabs",
+        description="Read, rescale and write each series in slabs to bound memory use",
+        default=False,
+    )
+    slab_size: bpy.props.IntProperty(
+        name="Slab Size",
+        description="Number of slices decoded per slab when streaming",
+        default=64,
+        min=1,
+    )
+    window_preset: bpy.props.EnumProperty(
+        name="Window",
+        description="Display window applied by the Image Material; voxels keep their modality units (HU for CT)",
+        items=_WINDOW_PRESET_ITEMS,
+        default="FULL",
+    )
+    voxel_format: bpy.props.EnumProperty(
+        name="Voxel Format",
+        description="Voxel type held in memory while importing and written to the VDB file",
+        items=_VOXEL_FORMAT_ITEMS,
+        default="FLOAT32",
+    )
+    lod_levels: bpy.props.IntProperty(
+        name="Viewport LOD Levels",
+        description="Also write this many half-resolution copies (1/2, 1/4, 1/8) for a responsive viewport; renders use full resolution",
+        default=0,
+        min=0,
+        max=3,
+    )
+    use_sparse: bpy.props.BoolProperty(
+        name="Sparse Air Background",
+        description="Leave voxels close to air (CT) or the sampled minimum (MR) inactive to shrink memory, file size and render traversal",
+        default=False,
+    )
+    background_tolerance: bpy.props.FloatProperty(
+        name="Background Tolerance",
+        description="Voxels within this many modality units (HU for CT) of the background are left inactive",
+        default=50.0,
+        min=0.0,
+    )
 
     def execute(self, _context):
-        success = load_ct_series(Path(self.filepath))
+        folder = Path(self.directory) if self.directory else Path(self.filepath).parent
+        series_uids = None
+        if not self.import_all:
+            series_uids = []
+            for file_entry in self.files:
+                header = read_dicom_header(folder / file_entry.name)
+                series_uid = getattr(header, "SeriesInstanceUID", None) if header is not None else None
+                if series_uid and str(series_uid) not in series_uids:
+                    series_uids.append(str(series_uid))
+        slab_size = self.slab_size if self.use_streaming else None
+        success = load_all_ct_series(
+            folder,
+            series_uids=series_uids,
+            slab_size=slab_size,
+            window_preset=self.window_preset,
+            voxel_format=self.voxel_format,
+            lod_levels=self.lod_levels,
+            background_tolerance=self.background_tolerance if self.use_sparse else None,
+        )
         return {"FINISHED"} if success else {"CANCELLED"}
 
 
@@ -197,38 +699,328 @@ class SNA_OT_Load_Proton_1Dbc6(bpy.types.Operator, ImportHelper):
         return {"FINISHED"} if success else {"CANCELLED"}
 
 
+class MEDBLEND_OT_Compute_Proton_Dose(bpy.types.Operator, ImportHelper):
+    bl_idname = "medblend.compute_proton_dose"
+    bl_label = "Compute Proton Dose"
+    bl_description = "Compute a quick-look pencil-beam dose of an RT Ion plan on its imported CT"
+    bl_options = {"REGISTER", "UNDO"}
+    filter_glob: bpy.props.StringProperty(default="*", options={"HIDDEN"})
+    grid_spacing_mm: bpy.props.FloatProperty(
+        name="Grid Spacing (mm)",
+        description="Voxel size of the calculation and output dose grid",
+        default=3.0,
+        min=0.5,
+        soft_max=10.0,
+    )
+    spot_sigma_mm: bpy.props.FloatProperty(
+        name="Spot Sigma (mm)",
+        description="Lateral sigma of each spot entering the patient, before multiple scattering",
+        default=4.0,
+        min=0.1,
+        soft_max=20.0,
+    )
+    protons_per_weight: bpy.props.FloatProperty(
+        name="Protons per Weight",
+        description="Protons delivered per unit of spot meterset weight, scaling the dose to Gy",
+        default=1e9,
+        min=0.0,
+    )
+    per_beam: bpy.props.BoolProperty(
+        name="Per Beam",
+        description="Import one dose volume per beam instead of the plan sum",
+        default=False,
+    )
+    lod_levels: bpy.props.IntProperty(
+        name="Viewport LOD Levels",
+        description="Also write this many half-resolution copies (1/2, 1/4, 1/8) for a responsive viewport; renders use full resolution",
+        default=0,
+        min=0,
+        max=3,
+    )
+    dose_threshold: bpy.props.FloatProperty(
+        name="Dose Threshold",
+        description="Leave voxels at or below this fraction of the maximum dose inactive in the sparse dose grid",
+        default=0.01,
+        min=0.0,
+        max=1.0,
+        subtype="FACTOR",
+    )
+
+    def execute(self, _context):
+        success = load_pencil_beam_dose(
+            Path(self.filepath),
+            grid_spacing_mm=self.grid_spacing_mm,
+            spot_sigma_mm=self.spot_sigma_mm,
+            protons_per_weight=self.protons_per_weight,
+            per_beam=self.per_beam,
+            lod_levels=self.lod_levels,
+            dose_threshold=self.dose_threshold,
+        )
+        return {"FINISHED"} if success else {"CANCELLED"}
+
+
 class SNA_OT_Load_Dose_7629F(bpy.types.Operator, ImportHelper):
     bl_idname = "medblend.load_dose"
     bl_label = "Load Dose"
     bl_description = "Load a DICOM Dose File"
     bl_options = {"REGISTER", "UNDO"}
     filter_glob: bpy.props.StringProperty(default="*", options={"HIDDEN"})
+    lod_levels: bpy.props.IntProperty(
+        name="Viewport LOD Levels",
+        description="Also write this many half-resolution copies (1/2, 1/4, 1/8) for a responsive viewport; renders use full resolution",
+        default=0,
+        min=0,
+        max=3,
+    )
+    dose_threshold: bpy.props.FloatProperty(
+        name="Dose Threshold",
+        description="Leave voxels at or below this fraction of the maximum dose inactive in the sparse dose grid",
+        default=0.01,
+        min=0.0,
+        max=1.0,
+        subtype="FACTOR",
+    )
+    resample_to_ct: bpy.props.BoolProperty(
+        name="Resample to CT Grid",
+        description="Write the dose on the voxel grid of the imported CT with the same frame of reference",
+        default=False,
+    )
+
+    def execute(self, _context):
+        success = load_dose(
+            Path(self.filepath),
+            lod_levels=self.lod_levels,
+            dose_threshold=self.dose_threshold,
+            resample_to_ct=self.resample_to_ct,
+        )
+        return {"FINISHED"} if success else {"CANCELLED"}
+
+
+class MEDBLEND_OT_Load_Plan_Sum(bpy.types.Operator, ImportHelper):
+    bl_idname = "medblend.load_plan_sum"
+    bl_label = "Load Plan Sum"
+    bl_description = "Sum several DICOM Dose files (e.g. one per beam) into a single dose volume"
+    bl_options = {"REGISTER", "UNDO"}
+    filter_glob: bpy.props.StringProperty(default="*", options={"HIDDEN"})
+    files: bpy.props.CollectionProperty(type=bpy.types.OperatorFileListElement, options={"HIDDEN", "SKIP_SAVE"})
+    directory: bpy.props.StringProperty(subtype="DIR_PATH", options={"HIDDEN"})
+    lod_levels: bpy.props.IntProperty(
+        name="Viewport LOD Levels",
+        description="Also write this many half-resolution copies (1/2, 1/4, 1/8) for a responsive viewport; renders use full resolution",
+        default=0,
+        min=0,
+        max=3,
+    )
+    dose_threshold: bpy.props.FloatProperty(
+        name="Dose Threshold",
+        description="Leave voxels at or below this fraction of the maximum dose inactive in the sparse dose grid",
+        default=0.01,
+        min=0.0,
+        max=1.0,
+        subtype="FACTOR",
+    )
 
     def execute(self, _context):
-        success = load_dose(Path(self.filepath))
+        folder = Path(self.directory) if self.directory else Path(self.filepath).parent
+        file_paths = [folder / file_entry.name for file_entry in self.files if file_entry.name]
+        if not file_paths:
+            file_paths = [Path(self.filepath)]
+        success = load_plan_sum(file_paths, lod_levels=self.lod_levels, dose_threshold=self.dose_threshold)
         return {"FINISHED"} if success else {"CANCELLED"}
 
 
+class MEDBLEND_OT_Load_Isodose(bpy.types.Operator, ImportHelper):
+    bl_idname = "medblend.load_isodose"
+    bl_label = "Load Isodose Surfaces"
+    bl_description = "Extract isodose surfaces of a DICOM RT Dose file as meshes"
+    bl_options = {"REGISTER", "UNDO"}
+    filter_glob: bpy.props.StringProperty(default="*", options={"HIDDEN"})
+    levels: bpy.props.StringProperty(
+        name="Levels (%)",
+        description="Comma-separated isodose levels in percent of the prescription dose",
+        default="95, 80, 50, 20",
+    )
+    prescription_dose: bpy.props.FloatProperty(
+        name="Prescription Dose",
+        description="Dose that 100% refers to, in the dose units (Gy); 0 uses the maximum dose",
+        default=0.0,
+        min=0.0,
+    )
+
+    def execute(self, _context):
+        try:
+            levels = [float(value) for value in self.levels.replace(";", ",").split(",") if value.strip()]
+        except ValueError:
+            self.report({"ERROR"}, f"Invalid isodose levels: {self.levels}")
+            return {"CANCELLED"}
+        success = load_isodose_surfaces(Path(self.filepath), levels, prescription_dose=self.prescription_dose)
+        return {"FINISHED"} if success else {"CANCELLED"}
+
+
+class MEDBLEND_OT_Load_Gamma(bpy.types.Operator):
+    bl_idname = "medblend.load_gamma"
+    bl_label = "Gamma Comparison"
+    bl_description = "Compute the 3D gamma index of an evaluated RT Dose against a reference RT Dose and import the gamma map"
+    bl_options = {"REGISTER", "UNDO"}
+
+    reference_path: bpy.props.StringProperty(name="Reference Dose", subtype="FILE_PATH")
+    evaluated_path: bpy.props.StringProperty(name="Evaluated Dose", subtype="FILE_PATH")
+    dose_percent: bpy.props.FloatProperty(
+        name="Dose Difference (%)",
+        description="Dose-difference criterion in percent of the normalisation dose",
+        default=3.0,
+        min=0.1,
+        max=100.0,
+    )
+    dta_mm: bpy.props.FloatProperty(
+        name="DTA (mm)",
+        description="Distance-to-agreement criterion",
+        default=3.0,
+        min=0.1,
+        soft_max=10.0,
+    )
+    use_local: bpy.props.BoolProperty(
+        name="Local Normalisation",
+        description="Normalise dose differences to the local reference dose instead of its maximum",
+        default=False,
+    )
+    cutoff_percent: bpy.props.FloatProperty(
+        name="Low-Dose Cutoff (%)",
+        description="Skip reference voxels below this percentage of the maximum reference dose",
+        default=10.0,
+        min=0.0,
+        max=100.0,
+    )
+    resolution: bpy.props.IntProperty(
+        name="Search Resolution",
+        description="Subdivisions of the reference voxel used when searching for agreement",
+        default=3,
+        min=1,
+        max=8,
+    )
+
+    def execute(self, _context):
+        if not self.reference_path or not self.evaluated_path:
+            self.report({"WARNING"}, "Choose a reference and an evaluated dose file")
+            return {"CANCELLED"}
+        summary = load_gamma(
+            Path(bpy.path.abspath(self.reference_path)),
+            Path(bpy.path.abspath(self.evaluated_path)),
+            dose_percent=self.dose_percent,
+            dta_mm=self.dta_mm,
+            local=self.use_local,
+            cutoff_percent=self.cutoff_percent,
+            resolution=self.resolution,
+        )
+        if summary is None:
+            return {"CANCELLED"}
+        self.report(
+            {"INFO"},
+            f"Gamma {summary['criteria']}: {summary['pass_rate']:.1f}% pass "
+            f"({summary['passed_voxels']}/{summary['evaluated_voxels']} voxels)",
+        )
+        return {"FINISHED"}
+
+    def invoke(self, context, _event):
+        return context.window_manager.invoke_props_dialog(self)
+
+
 class SNA_OT_Load_Structures_5Ebc9(bpy.types.Operator, ImportHelper):
     bl_idname = "medblend.load_structures"
     bl_label = "Load Structures"
     bl_description = "Load a DICOM Structure Set"
     bl_options = {"REGISTER", "UNDO"}
     filter_glob: bpy.props.StringProperty(default="*", options={"HIDDEN"})
+    lod_levels: bpy.props.IntProperty(
+        name="Viewport LOD Levels",
+        description="Also write this many half-resolution copies (1/2, 1/4, 1/8) for a responsive viewport; renders use full resolution",
+        default=0,
+        min=0,
+        max=3,
+    )
+    single_object: bpy.props.BoolProperty(
+        name="Single Object",
+        description="Write every ROI as a named grid of one VDB file and volume object instead of one object per ROI",
+        default=False,
+    )
+    output_mode: bpy.props.EnumProperty(
+        name="Output",
+        description="Import ROIs as mask volumes or as surface meshes",
+        items=(
+            ("VOLUME", "Volume", "Sparse mask volumes"),
+            ("MESH", "Mesh", "Triangle surfaces from marching cubes, faster to render"),
+        ),
+        default="VOLUME",
+    )
+    smoothing_iterations: bpy.props.IntProperty(
+        name="Smoothing Iterations",
+        description="Taubin smoothing passes applied to mesh output",
+        default=10,
+        min=0,
+    )
+    decimate_voxels: bpy.props.FloatProperty(
+        name="Decimate Cell (voxels)",
+        description="Merge mesh vertices within cells of this many voxels; 0 keeps the full surface",
+        default=0.0,
+        min=0.0,
+    )
+    use_roi_selection: bpy.props.BoolProperty(
+        name="Selected ROIs Only",
+        description="Import only the ROIs selected in the ROI picker, from the structure set it listed",
+        default=False,
+        options={"HIDDEN", "SKIP_SAVE"},
+    )
 
-    def execute(self, _context):
-        success = load_structures(Path(self.filepath))
+    def execute(self, context):
+        file_path = Path(self.filepath)
+        roi_numbers = None
+        if self.use_roi_selection:
+            picker = context.scene.medblend_roi_picker
+            file_path = Path(picker.filepath)
+            roi_numbers = [item.roi_number for item in picker.rois if item.selected]
+            if not roi_numbers:
+                self.report({"WARNING"}, "No ROIs are selected")
+                return {"CANCELLED"}
+        success = load_structures(
+            file_path,
+            lod_levels=self.lod_levels,
+            single_object=self.single_object,
+            output_mode=self.output_mode,
+            smoothing_iterations=self.smoothing_iterations,
+            decimate_voxels=self.decimate_voxels,
+            roi_numbers=roi_numbers,
+        )
         return {"FINISHED"} if success else {"CANCELLED"}
 
 
 classes: Iterable[type] = (
+    MEDBLEND_ROI_Preset,
+    MEDBLEND_ROI_Item,
+    MEDBLEND_ROI_Picker,
+    MEDBLEND_DVH_Row,
+    MEDBLEND_DVH_Settings,
     MEDBLEND_Preferences,
     SNA_PT_MEDBLEND_70A7C,
     MEDBLEND_OT_Select_Vdb_Temp_Dir,
     MEDBLEND_OT_Clear_Vdb_Temp_Dir,
+    MEDBLEND_OT_Set_Viewport_Lod,
+    MEDBLEND_UL_ROIs,
+    MEDBLEND_OT_List_Structure_Rois,
+    MEDBLEND_OT_Select_Rois,
+    MEDBLEND_OT_Save_Roi_Preset,
+    MEDBLEND_OT_Apply_Roi_Preset,
+    MEDBLEND_OT_Remove_Roi_Preset,
+    MEDBLEND_UL_DVH,
+    MEDBLEND_OT_Compute_Dvh,
+    MEDBLEND_OT_Export_Dvh_Csv,
     SNA_OT_Load_Ct_Fc7B9,
+    MEDBLEND_OT_Load_All_Series,
     SNA_OT_Load_Proton_1Dbc6,
+    MEDBLEND_OT_Compute_Proton_Dose,
     SNA_OT_Load_Dose_7629F,
+    MEDBLEND_OT_Load_Plan_Sum,
+    MEDBLEND_OT_Load_Isodose,
+    MEDBLEND_OT_Load_Gamma,
     SNA_OT_Load_Structures_5Ebc9,
 )
 
@@ -238,6 +1030,11 @@ def register():
     _icons = bpy.utils.previews.new()
     for cls in classes:
         bpy.utils.register_class(cls)
+    bpy.types.Scene.medblend_roi_picker = bpy.props.PointerProperty(type=MEDBLEND_ROI_Picker)
+    bpy.types.Scene.medblend_dvh = bpy.props.PointerProperty(type=MEDBLEND_DVH_Settings)
+    bpy.app.handlers.render_init.append(use_render_lods)
+    bpy.app.handlers.render_complete.append(restore_viewport_lods)
+    bpy.app.handlers.render_cancel.append(restore_viewport_lods)
 
 
 def unregister():
@@ -245,5 +1042,14 @@ def unregister():
     if _icons is not None:
         bpy.utils.previews.remove(_icons)
         _icons = None
+    for handlers, handler in (
+        (bpy.app.handlers.render_init, use_render_lods),
+        (bpy.app.handlers.render_complete, restore_viewport_lods),
+        (bpy.app.handlers.render_cancel, restore_viewport_lods),
+    ):
+        if handler in handlers:
+            handlers.remove(handler)
+    del bpy.types.Scene.medblend_dvh
+    del bpy.types.Scene.medblend_roi_picker
     for cls in reversed(classes):
         bpy.utils.unregister_class(cls)
@@ -1,4 +1,5 @@
 import bpy
+import numpy as np
 
 
 def add_data_fields(mesh, data_fields):
@@ -10,10 +11,11 @@ def add_data_fields(mesh, data_fields):
     for data_field in data_fields:
         mesh.attributes.new(name=data_field if data_field else "empty_key_string", type='FLOAT', domain='POINT')
 
-def create_object(mesh, name):
+def create_object(mesh, name, deselect_others=True):
     # Create new object
-    for ob in bpy.context.selected_objects:
-        ob.select_set(False)
+    if deselect_others:
+        for ob in bpy.context.selected_objects:
+            ob.select_set(False)
     obj = bpy.data.objects.new(name, mesh)
     collection = bpy.context.collection or bpy.context.scene.collection
     collection.objects.link(obj)
@@ -21,3 +23,15 @@ def create_object(mesh, name):
     obj.select_set(True)
     return obj
 
+
+def create_mesh(name, vertices, faces):
+    """Build a triangle mesh from (N, 3) vertex and (M, 3) face arrays using bulk foreach_set calls."""
+    mesh = bpy.data.meshes.new(name)
+    mesh.vertices.add(len(vertices))
+    mesh.vertices.foreach_set("co", np.asarray(vertices, dtype=np.float32).ravel())
+    mesh.loops.add(len(faces) * 3)
+    mesh.loops.foreach_set("vertex_index", np.asarray(faces, dtype=np.int32).ravel())
+    mesh.polygons.add(len(faces))
+    mesh.polygons.foreach_set("loop_start", np.arange(0, len(faces) * 3, 3, dtype=np.int32))
+    mesh.update(calc_edges=True)
+    return mesh
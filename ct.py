@@ -2,70 +2,57 @@
 
 from __future__ import annotations
 
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Iterable, Optional, Sequence
 
 import numpy as np
-import pydicom
 
+from .dicom_index import index_directory
 from .dicom_util import (
+    cast_modality_values,
     check_dicom_image_type,
+    default_worker_count,
     extract_dicom_data,
-    filter_by_series_uid,
-    load_dicom_images,
-    rescale_dicom_image,
-    sort_by_instance_number,
+    extract_dicom_metadata,
+    group_image_series,
+    iter_dicom_slabs,
+    read_dicom_header,
+    read_plane_range,
+    sample_intensity_range,
+    sort_by_slice_position,
+    window_value_range,
 )
-from .node_groups import apply_dicom_shader
+from .node_groups import apply_windowed_shader
+from .resample import linear_slice_weights, resample_slices, uniform_offsets, uniform_slice_spacing
 from .ui_utils import show_message_box
-from .volume_utils import write_vdb_volume
+from .volume_utils import read_vdb_grid, resolve_dicom_index_path, write_vdb_volume, write_vdb_volume_slabs
 
 
-def load_ct_series(file_path: Path) -> bool:
-    try:
-        selected_file = pydicom.dcmread(file_path)
-    except Exception as exc:
-        show_message_box(f"Unable to read file: {exc}", "Error", "ERROR")
-        return False
-
-    if not check_dicom_image_type(selected_file):
-        show_message_box("Selected file is not a CT or MR DICOM.", "Error", "ERROR")
-        return False
+# In-memory voxel type per import format, and whether the VDB file stores half floats.
+# Every format holds modality units (HU for CT); half floats are exact to +-2048.
+VOXEL_FORMATS = {
+    "FLOAT32": (np.float32, False),
+    "HALF": (np.float16, True),
+    "INT16": (np.int16, True),
+}
 
-    series_uid = getattr(selected_file, "SeriesInstanceUID", None)
-    if not series_uid:
-        show_message_box("Missing SeriesInstanceUID on selected DICOM.", "Error", "ERROR")
-        return False
+# Background of sparse CT grids, in Hounsfield units.
+AIR_HU = -1000.0
 
-    images = load_dicom_images(file_path.parent)
-    filtered_images = filter_by_series_uid(images, series_uid)
-    sorted_images = sort_by_instance_number(filtered_images)
 
+def _store_ct_frame(
+    ct_object,
+    frame_uid: str,
+    spacing_values: Sequence[float],
+    slice_positions: Sequence[Sequence[float]],
+    image_origin: Sequence[float],
+    image_orientation: Sequence[float],
+    volume_shape: Sequence[int],
+) -> None:
     try:
-        (
-            ct_volume,
-            spacing,
-            _slice_position,
-            slice_spacing,
-            _image_origin,
-            _image_orientation,
-            _image_columns,
-        ) = extract_dicom_data(sorted_images)
-    except Exception as exc:
-        show_message_box(str(exc), "Error", "ERROR")
-        return False
-
-    ct_volume = rescale_dicom_image(ct_volume)
-
-    slice_spacing = slice_spacing or 1.0
-    spacing_values = (float(slice_spacing), float(spacing[0]), float(spacing[1]))
-
-    result = write_vdb_volume(ct_volume, spacing_values, "CT.vdb")
-    if not result:
-        return False
-    _output_path, ct_object = result
-
-    try:
-        orientation = np.asarray(_image_orientation, dtype=float)
+        orientation = np.asarray(image_orientation, dtype=float)
         row_dir = orientation[:3]
         col_dir = orientation[3:]
         normal_dir = np.cross(row_dir, col_dir)
@@ -77,15 +64,13 @@ def load_ct_series(file_path: Path) -> bool:
 
         # Array axis 0 is flipped in extract_dicom_data, so the imported array origin
         # corresponds to the final source slice position.
-        slice_positions = np.asarray(_slice_position, dtype=float)
-        if slice_positions.ndim == 2 and slice_positions.shape[1] == 3 and len(slice_positions) > 0:
-            array_origin = slice_positions[-1]
+        positions = np.asarray(slice_positions, dtype=float)
+        if positions.ndim == 2 and positions.shape[1] == 3 and len(positions) > 0:
+            array_origin = positions[-1]
         else:
-            array_origin = np.asarray(_image_origin, dtype=float)
+            array_origin = np.asarray(image_origin, dtype=float)
 
-        row_spacing = float(spacing[0])
-        col_spacing = float(spacing[1])
-        slice_step = float(slice_spacing)
+        slice_step, row_spacing, col_spacing = (float(value) for value in spacing_values)
 
         # Basis columns map [slice, row, col] index steps to patient-space millimetres.
         slice_axis = -normal_dir * slice_step
@@ -93,16 +78,307 @@ def load_ct_series(file_path: Path) -> bool:
         col_axis = row_dir * col_spacing
         basis = np.column_stack((slice_axis, row_axis, col_axis))
 
-        frame_uid = getattr(selected_file, "FrameOfReferenceUID", "")
         ct_object["medblend_is_ct"] = True
         if frame_uid:
             ct_object["medblend_frame_of_reference_uid"] = str(frame_uid)
         ct_object["medblend_ct_origin_mm"] = [float(v) for v in array_origin]
         ct_object["medblend_ct_basis_mm"] = [float(v) for v in basis.reshape(-1)]
         ct_object["medblend_ct_spacing_mm"] = [float(v) for v in spacing_values]
+        # [slices, rows, cols] of the written grid, so structures can rasterise onto it.
+        ct_object["medblend_ct_shape"] = [int(v) for v in volume_shape]
     except Exception:
         # Metadata is best-effort and should not block import.
         pass
 
-    apply_dicom_shader("Image Material")
+
+def _iter_resampled_slabs(sorted_headers, lower, upper, weight, slab_size: int):
+    """Yield uniform-grid slabs, decoding only the source planes each slab needs."""
+
+    for first_index in range(0, len(weight), slab_size):
+        stop = min(first_index + slab_size, len(weight))
+        source_first = int(lower[first_index])
+        source_count = int(upper[stop - 1]) - source_first + 1
+        source = read_plane_range(sorted_headers, source_first, source_count, dtype=np.float32, apply_rescale=True)
+        yield first_index, resample_slices(
+            source,
+            lower[first_index:stop] - source_first,
+            upper[first_index:stop] - source_first,
+            weight[first_index:stop],
+        )
+
+
+def _import_sorted_series(
+    sorted_headers,
+    slice_projections: Optional[np.ndarray],
+    target_name: str,
+    slab_size: Optional[int] = None,
+    ct_volume: Optional[np.ndarray] = None,
+    window_preset: str = "FULL",
+    voxel_format: str = "FLOAT32",
+    lod_levels: int = 0,
+    background_tolerance: Optional[float] = None,
+) -> bool:
+    """Write one sorted series to VDB and tag the object with its CT frame.
+
+    ``slice_projections`` are the ascending slice positions along the normal
+    from :func:`sort_by_slice_position`; they set the slice spacing, and a
+    series with gaps or variable spacing is resampled onto a uniform grid.
+    ``ct_volume`` may carry an already decoded float32 volume (in modality
+    units) for the series. Voxels are written unwindowed in modality units
+    (HU for CT) as one of :data:`VOXEL_FORMATS`; ``window_preset`` only sets
+    the display window of the object's Image Material, where ``FULL`` is the
+    exact min/max of the written voxels.
+    ``lod_levels`` adds block-averaged 1/2, 1/4, ... viewport copies.
+    ``background_tolerance`` (modality units) writes a sparse grid where
+    voxels that close to air (CT) or the sampled minimum (MR) stay inactive.
+    """
+
+    modality = str(getattr(sorted_headers[0], "Modality", "")).upper()
+    try:
+        (
+            spacing,
+            slice_positions,
+            slice_spacing,
+            image_origin,
+            image_orientation,
+            _image_columns,
+        ) = extract_dicom_metadata(sorted_headers)
+        value_range = None if window_preset == "FULL" else window_value_range(sorted_headers, window_preset)
+        if background_tolerance is not None and modality != "CT":
+            background_value = sample_intensity_range(sorted_headers)[0]
+        else:
+            background_value = AIR_HU
+    except Exception as exc:
+        show_message_box(str(exc), "Error", "ERROR")
+        return False
+
+    resampling = None
+    num_planes = len(sorted_headers)
+    if slice_projections is not None and len(slice_projections) > 1:
+        # Volume planes run from the last sorted slice backwards, so offsets ascend from 0.
+        plane_offsets = slice_projections[-1] - slice_projections[::-1]
+        position_spacing, uniform = uniform_slice_spacing(plane_offsets)
+        if position_spacing > 0:
+            slice_spacing = position_spacing
+            if not uniform:
+                resampling = linear_slice_weights(plane_offsets, uniform_offsets(plane_offsets, position_spacing))
+                num_planes = len(resampling[2])
+
+    slice_spacing = slice_spacing or 1.0
+    spacing_values = (float(slice_spacing), float(spacing[0]), float(spacing[1]))
+    voxel_dtype, half_float = VOXEL_FORMATS.get(voxel_format, VOXEL_FORMATS["FLOAT32"])
+    # Exact min/max of every written voxel, for the FULL window.
+    value_bounds = [np.inf, -np.inf]
+
+    def track_bounds(volume: np.ndarray) -> None:
+        if volume.size:
+            value_bounds[0] = min(value_bounds[0], float(volume.min()))
+            value_bounds[1] = max(value_bounds[1], float(volume.max()))
+
+    def modality_slabs(size: int):
+        if resampling is not None:
+            source_slabs = _iter_resampled_slabs(sorted_headers, *resampling, size)
+        else:
+            source_slabs = iter_dicom_slabs(sorted_headers, size, dtype=np.float32, apply_rescale=True)
+        for first_index, slab in source_slabs:
+            slab = cast_modality_values(slab, voxel_dtype)
+            track_bounds(slab)
+            yield first_index, slab
+
+    write_options = {"half_float": half_float, "lod_levels": lod_levels}
+    if background_tolerance is not None:
+        write_options["background"] = float(background_value)
+        write_options["tolerance"] = float(background_tolerance)
+    try:
+        if ct_volume is None and slab_size:
+            # Mip levels need slab offsets aligned to the coarsest block size.
+            lod_block = 1 << max(0, int(lod_levels))
+            slab_size = -(-int(slab_size) // lod_block) * lod_block
+            result = write_vdb_volume_slabs(modality_slabs(slab_size), spacing_values, target_name, **write_options)
+        else:
+            if ct_volume is None and voxel_dtype == np.float32:
+                ct_volume = extract_dicom_data(sorted_headers, dtype=np.float32, apply_rescale=True)[0]
+            if ct_volume is not None:
+                if resampling is not None:
+                    ct_volume = resample_slices(ct_volume, *resampling)
+                ct_volume = cast_modality_values(ct_volume, voxel_dtype)
+                track_bounds(ct_volume)
+            else:
+                # Compact formats are assembled slab by slab, never holding a float32 volume.
+                first = sorted_headers[0]
+                ct_volume = np.empty((num_planes, int(first.Rows), int(first.Columns)), dtype=voxel_dtype)
+                for first_index, slab in modality_slabs(64):
+                    ct_volume[first_index : first_index + slab.shape[0]] = slab
+            result = write_vdb_volume(ct_volume, spacing_values, target_name, **write_options)
+            del ct_volume
+    except Exception as exc:
+        show_message_box(str(exc), "Error", "ERROR")
+        return False
+
+    if not result:
+        return False
+    _output_path, ct_object = result
+
+    frame_uid = str(getattr(sorted_headers[0], "FrameOfReferenceUID", ""))
+    volume_shape = (num_planes, int(sorted_headers[0].Rows), int(sorted_headers[0].Columns))
+    _store_ct_frame(
+        ct_object, frame_uid, spacing_values, slice_positions, image_origin, image_orientation, volume_shape
+    )
+    if value_range is None:
+        value_range = tuple(value_bounds) if value_bounds[0] <= value_bounds[1] else (0.0, 1.0)
+    # Density holds modality units; the Image Material maps this window onto its colour ramp.
+    ct_object["medblend_window_range"] = [float(value) for value in value_range]
+    ct_object["medblend_density_units"] = "HU" if modality == "CT" else "MODALITY"
+    ct_object["medblend_voxel_format"] = voxel_format
+    apply_windowed_shader("Image Material", value_range, ct_object)
     return True
+
+
+def read_ct_hu(ct_object) -> np.ndarray:
+    """Return an imported CT's voxels in Hounsfield units, read back from its VDB file.
+
+    Inactive voxels of a sparse import read as the air background. Raises
+    ``ValueError`` unless the density holds HU, so MR series and CTs
+    imported windowed (and clipped) by earlier versions are refused.
+    """
+
+    shape = ct_object.get("medblend_ct_shape")
+    if ct_object.get("medblend_density_units") != "HU":
+        raise ValueError(f"{ct_object.name} does not store Hounsfield units; re-import the CT series.")
+    if not shape:
+        raise ValueError(f"{ct_object.name} has no stored voxel shape; re-import the series.")
+    return read_vdb_grid(ct_object, shape)
+
+
+def _series_target_name(first_header, index: int) -> str:
+    """Return a VDB file name unique to the series: series numbers repeat across studies, UIDs do not."""
+
+    modality = str(getattr(first_header, "Modality", "CT"))
+    series_number = getattr(first_header, "SeriesNumber", None)
+    label = str(series_number) if series_number not in (None, "") else str(index + 1)
+    series_uid = str(getattr(first_header, "SeriesInstanceUID", "") or index)
+    digest = hashlib.sha1(series_uid.encode("ascii", "replace")).hexdigest()[:8]
+    return f"{modality}_{label}_{digest}.vdb"
+
+
+def load_ct_series(
+    file_path: Path,
+    slab_size: Optional[int] = None,
+    window_preset: str = "FULL",
+    voxel_format: str = "FLOAT32",
+    lod_levels: int = 0,
+    background_tolerance: Optional[float] = None,
+) -> bool:
+    """Import the CT/MR series containing ``file_path`` as a VDB volume.
+
+    With ``slab_size`` the series is decoded, rescaled and written
+    ``slab_size`` slices at a time. Intensities are converted to modality
+    units and stored unwindowed; ``window_preset`` sets the display window
+    (see :func:`window_value_range`).
+    ``lod_levels`` writes that many lower-resolution copies for the viewport
+    and ``background_tolerance`` enables sparse output around air.
+    """
+
+    selected_file = read_dicom_header(file_path)
+    if selected_file is None:
+        show_message_box(f"Unable to read file: {file_path.name}", "Error", "ERROR")
+        return False
+
+    if not check_dicom_image_type(selected_file):
+        show_message_box("Selected file is not a CT or MR DICOM.", "Error", "ERROR")
+        return False
+
+    series_uid = getattr(selected_file, "SeriesInstanceUID", None)
+    if not series_uid:
+        show_message_box("Missing SeriesInstanceUID on selected DICOM.", "Error", "ERROR")
+        return False
+
+    # Headers first: only the selected series is ever decoded.
+    headers = index_directory(file_path.parent, resolve_dicom_index_path())
+    series_headers = group_image_series(headers).get(str(series_uid), [])
+    sorted_headers, slice_projections = sort_by_slice_position(series_headers)
+    return _import_sorted_series(
+        sorted_headers,
+        slice_projections,
+        _series_target_name(sorted_headers[0], 0),
+        slab_size,
+        window_preset=window_preset,
+        voxel_format=voxel_format,
+        lod_levels=lod_levels,
+        background_tolerance=background_tolerance,
+    )
+
+
+def load_all_ct_series(
+    folder: Path,
+    series_uids: Optional[Iterable[str]] = None,
+    slab_size: Optional[int] = None,
+    window_preset: str = "FULL",
+    voxel_format: str = "FLOAT32",
+    lod_levels: int = 0,
+    background_tolerance: Optional[float] = None,
+) -> bool:
+    """Import several CT/MR series from ``folder`` after a single header pass.
+
+    ``series_uids`` limits the import to those series; ``None`` imports every
+    image series. Series share one decode pool, and the next series decodes
+    while the current one is written. In streaming mode (``slab_size``) or
+    with a compact ``voxel_format`` series are imported one after another to
+    keep memory bounded.
+    """
+
+    headers = index_directory(Path(folder), resolve_dicom_index_path())
+    series = group_image_series(headers)
+    if series_uids is not None:
+        wanted = [str(uid) for uid in series_uids]
+        series = {uid: series[uid] for uid in wanted if uid in series}
+    if not series:
+        show_message_box("No CT or MR series were found in the selected folder.", "Error", "ERROR")
+        return False
+
+    sorted_series = [sort_by_slice_position(series_headers) for series_headers in series.values()]
+    target_names = [
+        _series_target_name(series_headers[0], index) for index, (series_headers, _projections) in enumerate(sorted_series)
+    ]
+
+    options = {
+        "window_preset": window_preset,
+        "voxel_format": voxel_format,
+        "lod_levels": lod_levels,
+        "background_tolerance": background_tolerance,
+    }
+    imported_count = 0
+    if slab_size or voxel_format != "FLOAT32":
+        for (series_headers, slice_projections), target_name in zip(sorted_series, target_names):
+            imported_count += int(
+                _import_sorted_series(series_headers, slice_projections, target_name, slab_size, **options)
+            )
+        return imported_count > 0
+
+    with ThreadPoolExecutor(max_workers=default_worker_count()) as decode_pool, ThreadPoolExecutor(
+        max_workers=1
+    ) as prefetch:
+
+        def decode(series_headers):
+            return extract_dicom_data(series_headers, dtype=np.float32, executor=decode_pool, apply_rescale=True)[0]
+
+        pending = prefetch.submit(decode, sorted_series[0][0])
+        for index, (series_headers, slice_projections) in enumerate(sorted_series):
+            target_name = target_names[index]
+            try:
+                ct_volume = pending.result()
+            except Exception as exc:
+                show_message_box(f"{target_name}: {exc}", "Error", "ERROR")
+                ct_volume = None
+            # Decode the next series while this one is written on the main thread.
+            if index + 1 < len(sorted_series):
+                pending = prefetch.submit(decode, sorted_series[index + 1][0])
+            if ct_volume is not None:
+                imported_count += int(
+                    _import_sorted_series(
+                        series_headers, slice_projections, target_name, ct_volume=ct_volume, **options
+                    )
+                )
+            del ct_volume
+
+    return imported_count > 0
@@ -0,0 +1,169 @@
+"""Persistent on-disk index of DICOM headers keyed by path, size and mtime."""
+
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+import sqlite3
+import stat
+from typing import List, Optional
+
+import pydicom
+from pydicom.dataset import FileMetaDataset
+
+from .dicom_util import read_dicom_header
+
+
+INDEX_FILE_NAME = "medblend_dicom_index.sqlite"
+
+# Bump when the stored columns change; older index files are rebuilt.
+_SCHEMA_VERSION = 4
+
+# DICOM keywords cached per file. Multi-valued tags are stored as JSON lists.
+_INDEXED_KEYWORDS = (
+    "Modality",
+    "SeriesInstanceUID",
+    "SOPInstanceUID",
+    "FrameOfReferenceUID",
+    "SeriesNumber",
+    "SeriesDescription",
+    "InstanceNumber",
+    "ImagePositionPatient",
+    "ImageOrientationPatient",
+    "PixelSpacing",
+    "SliceThickness",
+    "Rows",
+    "Columns",
+    "NumberOfFrames",
+    "SamplesPerPixel",
+    "BitsAllocated",
+    "BitsStored",
+    "PixelRepresentation",
+    "RescaleSlope",
+    "RescaleIntercept",
+)
+_MULTI_VALUED_KEYWORDS = {"ImagePositionPatient", "ImageOrientationPatient", "PixelSpacing"}
+
+
+def _connect(db_path: Path) -> sqlite3.Connection:
+    connection = sqlite3.connect(str(db_path))
+    version = connection.execute("PRAGMA user_version").fetchone()[0]
+    if version != _SCHEMA_VERSION:
+        connection.execute("DROP TABLE IF EXISTS files")
+        connection.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+
+    keyword_columns = ", ".join(f"{keyword} TEXT" for keyword in _INDEXED_KEYWORDS)
+    connection.execute(
+        "CREATE TABLE IF NOT EXISTS files ("
+        "path TEXT PRIMARY KEY, folder TEXT NOT NULL, size INTEGER NOT NULL, "
+        "mtime_ns INTEGER NOT NULL, is_dicom INTEGER NOT NULL, "
+        "transfer_syntax TEXT, pixel_data_offset INTEGER, "
+        f"{keyword_columns})"
+    )
+    connection.execute("CREATE INDEX IF NOT EXISTS files_folder ON files (folder)")
+    return connection
+
+
+def _encode_value(keyword: str, header: pydicom.Dataset) -> Optional[str]:
+    value = getattr(header, keyword, None)
+    if value is None or value == "":
+        return None
+    if keyword in _MULTI_VALUED_KEYWORDS:
+        return json.dumps([float(item) for item in value])
+    return json.dumps(value if isinstance(value, (int, float)) else str(value))
+
+
+def _header_to_row(
+    file_path: Path,
+    folder: str,
+    file_stat: os.stat_result,
+    header: Optional[pydicom.Dataset],
+) -> tuple:
+    if header is None:
+        return (str(file_path), folder, file_stat.st_size, file_stat.st_mtime_ns, 0, None, None) + (
+            None,
+        ) * len(_INDEXED_KEYWORDS)
+
+    transfer_syntax = getattr(getattr(header, "file_meta", None), "TransferSyntaxUID", None)
+    return (
+        str(file_path),
+        folder,
+        file_stat.st_size,
+        file_stat.st_mtime_ns,
+        1,
+        str(transfer_syntax) if transfer_syntax else None,
+        getattr(header, "pixel_data_offset", None),
+    ) + tuple(_encode_value(keyword, header) for keyword in _INDEXED_KEYWORDS)
+
+
+def _row_to_header(row: tuple) -> pydicom.Dataset:
+    path, transfer_syntax, pixel_data_offset = row[0], row[5], row[6]
+    header = pydicom.Dataset()
+    header.file_meta = FileMetaDataset()
+    if transfer_syntax:
+        header.file_meta.TransferSyntaxUID = transfer_syntax
+    for keyword, encoded in zip(_INDEXED_KEYWORDS, row[7:]):
+        if encoded is not None:
+            setattr(header, keyword, json.loads(encoded))
+    header.filename = path
+    header.pixel_data_offset = pixel_data_offset
+    return header
+
+
+def index_directory(folder: Path, db_path: Optional[Path] = None) -> List[pydicom.Dataset]:
+    """Return header datasets for every DICOM file directly inside ``folder``.
+
+    Headers are cached in the SQLite file at ``db_path``. A cached entry is
+    reused while the file's size and modification time are unchanged, so a
+    repeat scan costs one ``stat`` per file. Non-DICOM files are remembered too.
+    Without ``db_path`` (or if the index cannot be opened) headers are read
+    directly.
+    """
+
+    folder = Path(folder).resolve()
+    entries = []
+    for file_path in sorted(folder.iterdir()):
+        try:
+            file_stat = file_path.stat()
+        except OSError:
+            continue
+        if stat.S_ISREG(file_stat.st_mode):
+            entries.append((file_path, file_stat))
+
+    connection = None
+    if db_path is not None:
+        try:
+            connection = _connect(db_path)
+        except sqlite3.Error:
+            connection = None
+
+    if connection is None:
+        headers = (read_dicom_header(file_path) for file_path, _file_stat in entries)
+        return [header for header in headers if header is not None]
+
+    folder_key = str(folder)
+    headers: List[pydicom.Dataset] = []
+    try:
+        with connection:
+            cached = {
+                row[0]: row
+                for row in connection.execute("SELECT * FROM files WHERE folder = ?", (folder_key,))
+            }
+            fresh_rows = []
+            for file_path, file_stat in entries:
+                row = cached.pop(str(file_path), None)
+                if row is None or row[2] != file_stat.st_size or row[3] != file_stat.st_mtime_ns:
+                    row = _header_to_row(file_path, folder_key, file_stat, read_dicom_header(file_path))
+                    fresh_rows.append(row)
+                if row[4]:
+                    headers.append(_row_to_header(row))
+
+            placeholders = ", ".join("?" * (7 + len(_INDEXED_KEYWORDS)))
+            connection.executemany(f"INSERT OR REPLACE INTO files VALUES ({placeholders})", fresh_rows)
+            # Whatever is left in ``cached`` has been deleted or renamed on disk.
+            connection.executemany("DELETE FROM files WHERE path = ?", [(path,) for path in cached])
+    finally:
+        connection.close()
+
+    return headers
@@ -2,11 +2,48 @@
 
 from __future__ import annotations
 
+from concurrent.futures import Executor, ThreadPoolExecutor
+import os
 from pathlib import Path
-from typing import Iterable, List, Sequence, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 import pydicom
 
 
+# Tags needed to identify, group and order image slices without touching pixels.
+IMAGE_HEADER_TAGS = (
+    "Modality",
+    "SeriesInstanceUID",
+    "SOPInstanceUID",
+    "FrameOfReferenceUID",
+    "SeriesNumber",
+    "SeriesDescription",
+    "InstanceNumber",
+    "ImagePositionPatient",
+    "ImageOrientationPatient",
+    "PixelSpacing",
+    "SliceThickness",
+    "Rows",
+    "Columns",
+    "NumberOfFrames",
+    "SamplesPerPixel",
+    "BitsAllocated",
+    "BitsStored",
+    "PixelRepresentation",
+    "RescaleSlope",
+    "RescaleIntercept",
+)
+
+# Window centre/width presets in Hounsfield units.
+WINDOW_PRESETS = {
+    "SOFT_TISSUE": (40.0, 400.0),
+    "LUNG": (-600.0, 1500.0),
+    "BONE": (400.0, 1800.0),
+}
+
+_PIXEL_DATA_TAG = b"\xe0\x7f\x10\x00"
+_UNDEFINED_LENGTH = 0xFFFFFFFF
+
+
 def is_dose_file(ds: pydicom.Dataset) -> bool:
     """Return ``True`` when the dataset represents a dose file."""
 
@@ -34,6 +71,134 @@ def check_dicom_image_type(ds: pydicom.Dataset) -> bool:
         return False
 
 
+def default_worker_count() -> int:
+    """Return the number of worker threads used for decoding and rasterising."""
+
+    return max(1, min(32, os.cpu_count() or 1))
+
+
+def map_pixel_data(header: pydicom.Dataset) -> Optional[np.ndarray]:
+    """Return a read-only memory map of the native pixel data behind ``header``.
+
+    Only single-sample, little-endian, uncompressed data whose stored bits fill
+    the allocated word (no unused high bits to mask or sign-extend) is mapped. The result has the same shape and
+    dtype as ``pixel_array``; ``None`` means the caller must decode instead.
+    """
+
+    import numpy as np
+
+    offset = getattr(header, "pixel_data_offset", None)
+    if offset is None:
+        return None
+
+    try:
+        samples = int(getattr(header, "SamplesPerPixel", 1))
+        bits_allocated = int(header.BitsAllocated)
+        bits_stored = int(getattr(header, "BitsStored", bits_allocated))
+        signed = int(getattr(header, "PixelRepresentation", 0)) == 1
+        rows = int(header.Rows)
+        columns = int(header.Columns)
+        frames = int(getattr(header, "NumberOfFrames", 1) or 1)
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+    if samples != 1 or bits_allocated not in (8, 16, 32):
+        return None
+    if bits_stored != bits_allocated:
+        return None
+
+    dtype = np.dtype(f"<{'i' if signed else 'u'}{bits_allocated // 8}")
+    shape = (frames, rows, columns) if frames > 1 else (rows, columns)
+    try:
+        return np.memmap(header.filename, dtype=dtype, mode="r", offset=int(offset), shape=shape)
+    except (OSError, ValueError):
+        return None
+
+
+def has_dicom_preamble(file_path: Path) -> bool:
+    """Return ``True`` when the file carries the ``DICM`` magic after its preamble."""
+
+    try:
+        with open(file_path, "rb") as handle:
+            handle.seek(128)
+            return handle.read(4) == b"DICM"
+    except OSError:
+        return False
+
+
+def _read_pixel_data_offset(handle, header: pydicom.Dataset) -> Optional[int]:
+    """Return the file offset of native pixel bytes, with ``handle`` at the element tag."""
+
+    transfer_syntax = getattr(getattr(header, "file_meta", None), "TransferSyntaxUID", None)
+    if transfer_syntax is None or transfer_syntax.is_compressed or transfer_syntax.is_deflated:
+        return None
+    if not transfer_syntax.is_little_endian:
+        return None
+
+    tag_position = handle.tell()
+    element_header = handle.read(12)
+    if len(element_header) < 8 or element_header[:4] != _PIXEL_DATA_TAG:
+        return None
+
+    if transfer_syntax.is_implicit_VR:
+        length = int.from_bytes(element_header[4:8], "little")
+        value_position = tag_position + 8
+    else:
+        if len(element_header) < 12:
+            return None
+        length = int.from_bytes(element_header[8:12], "little")
+        value_position = tag_position + 12
+
+    if length == _UNDEFINED_LENGTH:
+        return None
+    return value_position
+
+
+def read_dicom_header(
+    file_path: Path,
+    specific_tags: Optional[Sequence[str]] = IMAGE_HEADER_TAGS,
+) -> Optional[pydicom.Dataset]:
+    """Read the header of ``file_path`` without loading pixel data.
+
+    Only ``specific_tags`` are parsed; pass ``None`` to read every non-pixel
+    element. The returned dataset also carries ``pixel_data_offset``: the byte
+    offset of uncompressed little-endian pixel data, or ``None`` when it cannot
+    be mapped.
+    """
+
+    if not has_dicom_preamble(file_path):
+        return None
+
+    try:
+        with open(file_path, "rb") as handle:
+            header = pydicom.dcmread(
+                handle,
+                stop_before_pixels=True,
+                specific_tags=list(specific_tags) if specific_tags is not None else None,
+            )
+            # pydicom rewinds to the pixel data tag when it stops before pixels.
+            header.pixel_data_offset = _read_pixel_data_offset(handle, header)
+    except Exception:
+        return None
+
+    header.filename = str(file_path)
+    return header
+
+
+def group_image_series(headers: Iterable[pydicom.Dataset]) -> Dict[str, List[pydicom.Dataset]]:
+    """Group CT/MR ``headers`` by ``SeriesInstanceUID``, dropping other modalities."""
+
+    series: Dict[str, List[pydicom.Dataset]] = {}
+    for header in headers:
+        if not check_dicom_image_type(header):
+            continue
+
+        series_uid = str(getattr(header, "SeriesInstanceUID", ""))
+        series.setdefault(series_uid, []).append(header)
+
+    return series
+
+
 def load_dicom_images(folder: Path) -> List[pydicom.Dataset]:
     """Load all CT/MR DICOM files within ``folder``."""
 
@@ -53,45 +218,123 @@ def load_dicom_images(folder: Path) -> List[pydicom.Dataset]:
     return images
 
 
-def rescale_dicom_image(array: np.ndarray) -> np.ndarray:
-    """Scale the array into the range ``[0, 1]``."""
+def sort_by_instance_number(images: Iterable[pydicom.Dataset]) -> List[pydicom.Dataset]:
+    """Return the images sorted by ``InstanceNumber``."""
+
+    return sorted(images, key=lambda x: getattr(x, "InstanceNumber", 0))
+
+
+def sort_by_slice_position(
+    images: Iterable[pydicom.Dataset],
+) -> Tuple[List[pydicom.Dataset], Optional[np.ndarray]]:
+    """Order slices along the slice normal in a single vectorised pass.
+
+    Returns the sorted images and their ascending positions along the normal
+    (mm). When any slice lacks ``ImagePositionPatient`` or the orientation is
+    unusable, the images are sorted by ``InstanceNumber`` and ``None`` is
+    returned for the positions.
+    """
 
     import numpy as np
 
-    min_value = float(np.min(array))
-    max_value = float(np.max(array))
-    if max_value == min_value:
-        return np.zeros_like(array, dtype=float)
+    images = list(images)
+    if not images:
+        return images, None
 
-    return (array - min_value) / (max_value - min_value)
+    try:
+        orientation = np.asarray(images[0].ImageOrientationPatient, dtype=float)
+        positions = np.asarray([image.ImagePositionPatient for image in images], dtype=float)
+    except (AttributeError, TypeError, ValueError):
+        return sort_by_instance_number(images), None
 
+    normal_dir = np.cross(orientation[:3], orientation[3:]) if orientation.size == 6 else np.zeros(3)
+    normal_norm = float(np.linalg.norm(normal_dir))
+    if positions.shape != (len(images), 3) or normal_norm == 0:
+        return sort_by_instance_number(images), None
 
-def sort_by_instance_number(images: Iterable[pydicom.Dataset]) -> List[pydicom.Dataset]:
-    """Return the images sorted by ``InstanceNumber``."""
+    projections = positions @ (normal_dir / normal_norm)
+    order = np.argsort(projections, kind="stable")
+    return [images[int(index)] for index in order], projections[order]
 
-    return sorted(images, key=lambda x: getattr(x, "InstanceNumber", 0))
 
+def _slice_pixels(image: pydicom.Dataset) -> np.ndarray:
+    """Return slice pixels, mapped from disk when possible and decoded otherwise."""
 
-def extract_dicom_data(
-    images: Sequence[pydicom.Dataset],
-) -> Tuple[np.ndarray, Sequence[float], Sequence[float], float, Sequence[float], Sequence[float], int]:
-    """Extract voxel data and metadata from the provided DICOM slices."""
+    pixels = map_pixel_data(image)
+    if pixels is not None:
+        return pixels
+    if "PixelData" not in image:
+        image = pydicom.dcmread(image.filename)
+    return image.pixel_array
 
-    import numpy as np
 
-    if not images:
-        raise ValueError("No DICOM images were provided for extraction")
+def _rescale_parameters(image: pydicom.Dataset) -> Tuple[float, float]:
+    slope = getattr(image, "RescaleSlope", None)
+    intercept = getattr(image, "RescaleIntercept", None)
+    slope = float(slope) if slope not in (None, "") else 1.0
+    intercept = float(intercept) if intercept not in (None, "") else 0.0
+    return slope, intercept
 
-    dicom_3d_array = []
-    slice_positions = []
-    for dataset in images:
-        dicom_3d_array.append(dataset.pixel_array)
-        slice_positions.append(getattr(dataset, "ImagePositionPatient", (0.0, 0.0, 0.0)))
 
-    array = np.asarray(dicom_3d_array)
-    array = np.flipud(array)
+def _decode_planes(
+    images: Sequence[pydicom.Dataset],
+    planes: np.ndarray,
+    first_index: int,
+    max_workers: Optional[int] = None,
+    executor: Optional[Executor] = None,
+    apply_rescale: bool = False,
+) -> None:
+    """Decode volume planes ``first_index`` onwards into ``planes`` on a thread pool.
+
+    Volume axis 0 is stored flipped relative to ``images``, so plane ``k``
+    holds ``images[-1 - k]``. A shared ``executor`` may be passed so several
+    series decode on the same workers. With ``apply_rescale`` each plane is
+    mapped through its own ``RescaleSlope``/``RescaleIntercept`` (HU for CT);
+    ``planes`` must then be floating point.
+    """
+
+    num_slices = len(images)
+    expected_shape = tuple(planes.shape[1:])
+
+    def decode_into(offset: int) -> None:
+        index = num_slices - 1 - (first_index + offset)
+        pixels = _slice_pixels(images[index])
+        if pixels.shape != expected_shape:
+            raise ValueError(f"Slice {index} has shape {pixels.shape}, expected {expected_shape}")
+        planes[offset] = pixels
+        if apply_rescale:
+            slope, intercept = _rescale_parameters(images[index])
+            if slope != 1.0:
+                planes[offset] *= slope
+            if intercept != 0.0:
+                planes[offset] += intercept
+
+    count = planes.shape[0]
+    if executor is not None:
+        list(executor.map(decode_into, range(count)))
+        return
+
+    workers = min(max_workers or default_worker_count(), count)
+    if workers <= 1:
+        for offset in range(count):
+            decode_into(offset)
+        return
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # list() re-raises the first decode error, if any.
+        list(executor.map(decode_into, range(count)))
+
+
+def extract_dicom_metadata(
+    images: Sequence[pydicom.Dataset],
+) -> Tuple[Sequence[float], Sequence[float], float, Sequence[float], Sequence[float], int]:
+    """Return the geometry metadata of the provided DICOM slices."""
+
+    if not images:
+        raise ValueError("No DICOM images were provided for extraction")
 
     first = images[0]
+    slice_positions = [getattr(dataset, "ImagePositionPatient", (0.0, 0.0, 0.0)) for dataset in images]
     spacing = getattr(first, "PixelSpacing", (1.0, 1.0))
     slice_thickness = getattr(first, "SliceThickness", 1.0)
     image_origin = getattr(first, "ImagePositionPatient", (0.0, 0.0, 0.0))
@@ -99,7 +342,6 @@ def extract_dicom_data(
     image_columns = getattr(first, "Columns", 0)
 
     return (
-        array,
         spacing,
         slice_positions,
         slice_thickness,
@@ -109,7 +351,157 @@ def extract_dicom_data(
     )
 
 
-def filter_by_series_uid(images: Iterable[pydicom.Dataset], series_uid: str) -> List[pydicom.Dataset]:
-    """Return the images that match the requested ``SeriesInstanceUID``."""
+def extract_dicom_data(
+    images: Sequence[pydicom.Dataset],
+    max_workers: Optional[int] = None,
+    dtype=None,
+    executor: Optional[Executor] = None,
+    apply_rescale: bool = False,
+) -> Tuple[np.ndarray, Sequence[float], Sequence[float], float, Sequence[float], Sequence[float], int]:
+    """Extract voxel data and metadata from the provided DICOM slices.
+
+    ``images`` may be full datasets or pixel-less headers from
+    :func:`read_dicom_header`. The volume is allocated once and slices are
+    decoded on a thread pool straight into their (flipped) plane. Pass
+    ``dtype`` (e.g. ``np.float32``) to convert while decoding instead of
+    keeping the stored pixel type, and ``apply_rescale`` to convert each slice
+    to modality units (HU for CT).
+    """
+
+    import numpy as np
+
+    metadata = extract_dicom_metadata(images)
+
+    first = images[0]
+    rows = int(getattr(first, "Rows", 0))
+    columns = int(getattr(first, "Columns", 0))
+    if dtype is None:
+        dtype = _slice_pixels(first).dtype
+
+    array = np.empty((len(images), rows, columns), dtype=dtype)
+    _decode_planes(images, array, 0, max_workers, executor, apply_rescale)
+
+    return (array,) + metadata
+
+
+def iter_dicom_slabs(
+    images: Sequence[pydicom.Dataset],
+    slab_size: int,
+    max_workers: Optional[int] = None,
+    dtype=None,
+    apply_rescale: bool = False,
+) -> Iterator[Tuple[int, np.ndarray]]:
+    """Yield ``(first_index, slab)`` chunks of the volume built by :func:`extract_dicom_data`.
+
+    Each slab holds at most ``slab_size`` planes and is released before the
+    next is decoded, so peak memory follows the slab size, not the series.
+    """
+
+    if not images:
+        raise ValueError("No DICOM images were provided for extraction")
+
+    if dtype is None:
+        dtype = _slice_pixels(images[0]).dtype
+
+    num_slices = len(images)
+    slab_size = max(1, int(slab_size))
+    for first_index in range(0, num_slices, slab_size):
+        count = min(slab_size, num_slices - first_index)
+        yield first_index, read_plane_range(images, first_index, count, max_workers, dtype, apply_rescale)
+
+
+def read_plane_range(
+    images: Sequence[pydicom.Dataset],
+    first_index: int,
+    count: int,
+    max_workers: Optional[int] = None,
+    dtype=None,
+    apply_rescale: bool = False,
+) -> np.ndarray:
+    """Decode ``count`` planes of the (flipped) volume starting at ``first_index``."""
+
+    import numpy as np
+
+    first = images[0]
+    rows = int(getattr(first, "Rows", 0))
+    columns = int(getattr(first, "Columns", 0))
+    if dtype is None:
+        dtype = _slice_pixels(first).dtype
+
+    planes = np.empty((count, rows, columns), dtype=dtype)
+    _decode_planes(images, planes, first_index, max_workers, apply_rescale=apply_rescale)
+    return planes
+
+
+def sample_intensity_range(
+    images: Sequence[pydicom.Dataset],
+    percentiles: Tuple[float, float] = (0.0, 100.0),
+    max_samples: int = 32,
+    max_workers: Optional[int] = None,
+) -> Tuple[float, float]:
+    """Estimate an intensity range from a histogram of evenly spaced sample slices.
+
+    Samples are converted to modality units (HU for CT). ``percentiles`` of
+    ``(0, 100)`` give the sampled min/max; narrower bounds ignore outliers.
+    """
+
+    import numpy as np
+
+    if not images:
+        raise ValueError("No DICOM images were provided for extraction")
+
+    sample_indices = np.unique(np.linspace(0, len(images) - 1, num=max(1, max_samples)).round().astype(int))
+
+    def read_sample(plane_index) -> np.ndarray:
+        return read_plane_range(images, int(plane_index), 1, 1, np.float32, apply_rescale=True)[0]
+
+    workers = min(max_workers or default_worker_count(), len(sample_indices))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        samples = np.stack(list(executor.map(read_sample, sample_indices)))
+
+    low, high = percentiles
+    if low <= 0.0 and high >= 100.0:
+        return float(np.min(samples)), float(np.max(samples))
+    # Every other pixel in-plane is plenty for a window estimate.
+    values = samples[:, ::2, ::2].ravel()
+    low_value, high_value = np.percentile(values, [low, high])
+    return float(low_value), float(high_value)
+
+
+def window_value_range(
+    images: Sequence[pydicom.Dataset],
+    preset: str = "FULL",
+) -> Tuple[float, float]:
+    """Return the display window for a ``preset`` in modality units.
+
+    ``FULL`` uses the sampled min/max (importers replace it with the exact
+    range once every voxel is read), ``AUTO`` the 0.5–99.5 percentile band of
+    the sampled histogram, and the :data:`WINDOW_PRESETS` keys fixed HU windows.
+    HU presets fall back to ``AUTO`` for non-CT series.
+    """
+
+    if preset in WINDOW_PRESETS and getattr(images[0], "Modality", "") == "CT":
+        center, width = WINDOW_PRESETS[preset]
+        return center - width / 2.0, center + width / 2.0
+    if preset == "FULL":
+        return sample_intensity_range(images)
+    return sample_intensity_range(images, percentiles=(0.5, 99.5))
+
+
+def cast_modality_values(array: np.ndarray, dtype) -> np.ndarray:
+    """Store modality values (HU for CT) in ``dtype`` without windowing.
+
+    Floating ``dtype`` values are cast directly; integer types round to the
+    nearest unit and saturate at the type's limits.
+    """
+
+    import numpy as np
+
+    dtype = np.dtype(dtype)
+    if np.issubdtype(dtype, np.floating):
+        return array.astype(dtype, copy=False)
 
-    return [image for image in images if getattr(image, "SeriesInstanceUID", None) == series_uid]
+    limits = np.iinfo(dtype)
+    rounded = np.rint(array)
+    np.clip(rounded, limits.min, limits.max, out=rounded)
+    return rounded.astype(dtype)
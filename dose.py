@@ -3,17 +3,21 @@
 from __future__ import annotations
 
 from pathlib import Path
+from typing import Optional
 
 import bpy
 import pydicom
 
-from .dicom_util import is_dose_file
+from .blender_utils import create_mesh
+from .dicom_util import default_worker_count, is_dose_file, map_pixel_data, read_dicom_header
 from .node_groups import apply_dicom_shader
+from .resample import trilinear_resample
+from .surface import extract_isosurfaces
 from .ui_utils import show_message_box
 from .volume_utils import align_object_to_ct_frame, set_object_patient_transform, write_vdb_volume
 
 
-def _find_ct_anchor(frame_uid: str):
+def find_ct_anchor(frame_uid: str):
     ct_candidates = [obj for obj in bpy.data.objects if bool(obj.get("medblend_is_ct"))]
     if frame_uid:
         ct_candidates = [obj for obj in ct_candidates if obj.get("medblend_frame_of_reference_uid", "") == frame_uid]
@@ -22,28 +26,10 @@ def _find_ct_anchor(frame_uid: str):
     return ct_candidates[-1]
 
 
-def load_dose(file_path: Path) -> bool:
-    try:
-        dataset = pydicom.dcmread(file_path)
-    except Exception as exc:
-        show_message_box(f"Unable to read file: {exc}", "Error", "ERROR")
-        return False
-
-    if not is_dose_file(dataset):
-        show_message_box("Selected file is not an RT Dose file.", "Error", "ERROR")
-        return False
+def dose_grid_geometry(dataset: pydicom.Dataset) -> dict:
+    """Return the grid of an RT Dose header: shape, spacing, origin, basis and axis directions."""
 
-    try:
-        import numpy as np
-    except Exception as exc:
-        show_message_box(f"numpy is required to load dose data: {exc}", "Missing Dependency", "ERROR")
-        return False
-
-    try:
-        pixel_data = dataset.pixel_array
-    except Exception as exc:
-        show_message_box(f"Unable to parse dose grid: {exc}", "Error", "ERROR")
-        return False
+    import numpy as np
 
     pixel_spacing = getattr(dataset, "PixelSpacing", [1.0, 1.0])
     row_spacing = float(pixel_spacing[0]) if len(pixel_spacing) > 0 else 1.0
@@ -66,71 +52,363 @@ def load_dose(file_path: Path) -> bool:
     if signed_slice_step is None:
         signed_slice_step = slice_spacing
 
-    dose_resolution = [slice_spacing, row_spacing, col_spacing]
+    dose_origin = np.asarray(getattr(dataset, "ImagePositionPatient", [0.0, 0.0, 0.0]), dtype=float)
+    orientation = np.asarray(getattr(dataset, "ImageOrientationPatient", [1.0, 0.0, 0.0, 0.0, 1.0, 0.0]), dtype=float)
+    row_dir = orientation[:3]
+    col_dir = orientation[3:]
+    normal_dir = np.cross(row_dir, col_dir)
+    normal_norm = float(np.linalg.norm(normal_dir))
+    if normal_norm > 0:
+        normal_dir = normal_dir / normal_norm
+    else:
+        normal_dir = np.asarray([0.0, 0.0, 1.0], dtype=float)
+
+    # Keep origin anchored to ImagePositionPatient (frame 0).
+    # GridFrameOffsetVector is still used for slice direction/spacing.
+    row_axis_dir = col_dir
+    col_axis_dir = row_dir
+    slice_axis_dir = normal_dir * (1.0 if signed_slice_step >= 0 else -1.0)
+    dose_basis = np.column_stack(
+        (
+            slice_axis_dir * slice_spacing,
+            row_axis_dir * row_spacing,
+            col_axis_dir * col_spacing,
+        )
+    )
+
+    return {
+        "shape": (
+            int(getattr(dataset, "NumberOfFrames", 1) or 1),
+            int(getattr(dataset, "Rows", 0)),
+            int(getattr(dataset, "Columns", 0)),
+        ),
+        "spacing": [slice_spacing, row_spacing, col_spacing],
+        "origin": dose_origin,
+        "basis": dose_basis,
+        "slice_axis_dir": slice_axis_dir,
+        "row_axis_dir": row_axis_dir,
+        "col_axis_dir": col_axis_dir,
+        "frame_uid": str(getattr(dataset, "FrameOfReferenceUID", "")),
+    }
+
+
+def read_dose_pixels(file_path: Path, dataset: pydicom.Dataset):
+    """Return the dose grid of ``dataset`` in dose units as a ``[frame, row, col]`` float32 array."""
+
+    import numpy as np
 
-    dose_matrix = np.asarray(pixel_data, dtype=float)
     dose_grid_scaling = float(getattr(dataset, "DoseGridScaling", 1.0) or 1.0)
     if dose_grid_scaling <= 0:
-        show_message_box("DoseGridScaling is invalid; expected a positive value.", "Error", "ERROR")
-        return False
-    dose_matrix *= dose_grid_scaling
+        raise ValueError("DoseGridScaling is invalid; expected a positive value.")
+
+    # Uncompressed dose grids are mapped straight from disk.
+    pixel_data = map_pixel_data(dataset)
+    if pixel_data is None:
+        pixel_data = pydicom.dcmread(file_path).pixel_array
+
+    dose_matrix = np.asarray(pixel_data, dtype=np.float32)
+    dose_matrix *= np.float32(dose_grid_scaling)
     if dose_matrix.ndim == 2:
         dose_matrix = dose_matrix[np.newaxis, ...]
+    return dose_matrix
 
-    result = write_vdb_volume(dose_matrix, dose_resolution, "dose.vdb")
+
+def write_dose_volume(dose_matrix, geometry: dict, target_name: str, lod_levels: int, dose_threshold: float) -> bool:
+    # Block maxima keep hot spots visible in the coarse viewport levels.
+    result = write_vdb_volume(
+        dose_matrix,
+        geometry["spacing"],
+        target_name,
+        lod_levels=lod_levels,
+        lod_reduce="max",
+        background=0.0,
+        tolerance=float(dose_threshold) * float(dose_matrix.max(initial=0.0)),
+    )
     if not result:
         return False
     _output_path, dose_object = result
+    align_dose_object(dose_object, geometry)
+    apply_dicom_shader("Dose Material")
+    return True
 
-    try:
-        dose_origin = np.asarray(getattr(dataset, "ImagePositionPatient", [0.0, 0.0, 0.0]), dtype=float)
-        orientation = np.asarray(getattr(dataset, "ImageOrientationPatient", [1.0, 0.0, 0.0, 0.0, 1.0, 0.0]), dtype=float)
-        row_dir = orientation[:3]
-        col_dir = orientation[3:]
-        normal_dir = np.cross(row_dir, col_dir)
-        normal_norm = float(np.linalg.norm(normal_dir))
-        if normal_norm > 0:
-            normal_dir = normal_dir / normal_norm
-        else:
-            normal_dir = np.asarray([0.0, 0.0, 1.0], dtype=float)
-
-        # Keep origin anchored to ImagePositionPatient (frame 0).
-        # GridFrameOffsetVector is still used for slice direction/spacing.
-
-        row_axis_dir = col_dir
-        col_axis_dir = row_dir
-        slice_axis_dir = normal_dir * (1.0 if signed_slice_step >= 0 else -1.0)
-        dose_basis = np.column_stack(
-            (
-                slice_axis_dir * slice_spacing,
-                row_axis_dir * row_spacing,
-                col_axis_dir * col_spacing,
-            )
-        )
 
+def align_dose_object(dose_object, geometry: dict) -> None:
+    """Place an object whose local axes are dose grid indices times spacing into the CT scene frame."""
+
+    try:
         # Align dose into the same scene frame used by imported CT data.
-        frame_uid = str(getattr(dataset, "FrameOfReferenceUID", ""))
-        ct_obj = _find_ct_anchor(frame_uid)
+        ct_obj = find_ct_anchor(geometry["frame_uid"])
         aligned = False
         if ct_obj:
             aligned = align_object_to_ct_frame(
                 dose_object,
                 ct_obj,
-                dose_origin,
-                dose_basis,
-                dose_resolution,
+                geometry["origin"],
+                geometry["basis"],
+                geometry["spacing"],
             )
         if not aligned:
             set_object_patient_transform(
                 dose_object,
-                dose_origin,
-                slice_axis_dir,
-                row_axis_dir,
-                col_axis_dir,
+                geometry["origin"],
+                geometry["slice_axis_dir"],
+                geometry["row_axis_dir"],
+                geometry["col_axis_dir"],
             )
     except Exception:
         # Best-effort spatial alignment only; fallback keeps legacy behaviour.
         pass
 
-    apply_dicom_shader("Dose Material")
+
+def ct_grid_geometry(ct_object) -> Optional[dict]:
+    """Return the voxel grid stored on an imported CT object, or ``None`` without full metadata."""
+
+    import numpy as np
+
+    shape = ct_object.get("medblend_ct_shape")
+    basis_flat = ct_object.get("medblend_ct_basis_mm")
+    if not shape or len(shape) != 3 or not basis_flat or len(basis_flat) != 9:
+        return None
+
+    basis = np.asarray(basis_flat, dtype=float).reshape((3, 3))
+    return {
+        "shape": tuple(int(value) for value in shape),
+        "spacing": [float(value) for value in ct_object.get("medblend_ct_spacing_mm", [1.0, 1.0, 1.0])],
+        "origin": np.asarray(ct_object.get("medblend_ct_origin_mm", [0.0, 0.0, 0.0]), dtype=float),
+        "basis": basis,
+        "slice_axis_dir": basis[:, 0] / np.linalg.norm(basis[:, 0]),
+        "row_axis_dir": basis[:, 1] / np.linalg.norm(basis[:, 1]),
+        "col_axis_dir": basis[:, 2] / np.linalg.norm(basis[:, 2]),
+        "frame_uid": str(ct_object.get("medblend_frame_of_reference_uid", "")),
+    }
+
+
+def resample_dose_to_ct(dose_matrix, dose_geometry: dict, ct_geometry: dict, max_workers: Optional[int] = None):
+    """Return ``dose_matrix`` trilinearly resampled onto the CT voxel lattice (zero outside the dose grid).
+
+    The patient-space mapping comes from the CT's stored basis; planes are
+    resampled in blocks, on ``max_workers`` threads when given.
+    """
+
+    return trilinear_resample(
+        dose_matrix,
+        dose_geometry["origin"],
+        dose_geometry["basis"],
+        ct_geometry["shape"],
+        ct_geometry["origin"],
+        ct_geometry["basis"],
+        max_workers=max_workers,
+    )
+
+
+def load_dose(
+    file_path: Path,
+    lod_levels: int = 0,
+    dose_threshold: float = 0.0,
+    resample_to_ct: bool = False,
+) -> bool:
+    """Import an RT Dose grid as a sparse VDB volume aligned to its CT.
+
+    Voxels at or below ``dose_threshold`` (a fraction of the maximum dose)
+    are left inactive, so the grid only stores the irradiated region. With
+    ``resample_to_ct`` and an imported CT in the same frame of reference, the
+    dose is written on the CT voxel lattice instead of its native grid.
+    """
+
+    dataset = read_dicom_header(file_path, specific_tags=None)
+    if dataset is None:
+        show_message_box(f"Unable to read file: {Path(file_path).name}", "Error", "ERROR")
+        return False
+
+    if not is_dose_file(dataset):
+        show_message_box("Selected file is not an RT Dose file.", "Error", "ERROR")
+        return False
+
+    try:
+        import numpy as np  # noqa: F401
+    except Exception as exc:
+        show_message_box(f"numpy is required to load dose data: {exc}", "Missing Dependency", "ERROR")
+        return False
+
+    try:
+        dose_matrix = read_dose_pixels(file_path, dataset)
+    except Exception as exc:
+        show_message_box(f"Unable to parse dose grid: {exc}", "Error", "ERROR")
+        return False
+
+    geometry = dose_grid_geometry(dataset)
+    if resample_to_ct:
+        ct_obj = find_ct_anchor(geometry["frame_uid"])
+        ct_geometry = ct_grid_geometry(ct_obj) if ct_obj else None
+        if ct_geometry is None:
+            show_message_box("No imported CT with grid metadata matches this dose.", "Error", "ERROR")
+            return False
+        try:
+            dose_matrix = resample_dose_to_ct(dose_matrix, geometry, ct_geometry, default_worker_count())
+        except Exception as exc:
+            show_message_box(f"Unable to resample dose onto the CT grid: {exc}", "Error", "ERROR")
+            return False
+        geometry = dict(ct_geometry, frame_uid=geometry["frame_uid"])
+
+    return write_dose_volume(dose_matrix, geometry, "dose.vdb", lod_levels, dose_threshold)
+
+
+def load_isodose_surfaces(file_path: Path, levels: list[float], prescription_dose: float = 0.0) -> bool:
+    """Import isodose surfaces of an RT Dose file as meshes, one per entry of ``levels``.
+
+    ``levels`` are percentages of ``prescription_dose``, or of the maximum
+    dose when it is ``0``. All levels are extracted in a single sweep of the
+    dose grid (see :func:`surface.extract_isosurfaces`) and every mesh is
+    placed with the same transform as the dose volume.
+    """
+
+    import numpy as np
+
+    dataset = read_dicom_header(file_path, specific_tags=None)
+    if dataset is None:
+        show_message_box(f"Unable to read file: {Path(file_path).name}", "Error", "ERROR")
+        return False
+
+    if not is_dose_file(dataset):
+        show_message_box("Selected file is not an RT Dose file.", "Error", "ERROR")
+        return False
+
+    try:
+        dose_matrix = read_dose_pixels(file_path, dataset)
+    except Exception as exc:
+        show_message_box(f"Unable to parse dose grid: {exc}", "Error", "ERROR")
+        return False
+
+    reference_dose = float(prescription_dose) if prescription_dose > 0 else float(dose_matrix.max(initial=0.0))
+    if reference_dose <= 0 or not levels:
+        show_message_box("No isodose levels to extract from this dose grid.", "Error", "ERROR")
+        return False
+
+    geometry = dose_grid_geometry(dataset)
+    # Padding with zero dose closes shells that reach the edge of the grid.
+    surfaces = extract_isosurfaces(np.pad(dose_matrix, 1), [reference_dose * level / 100.0 for level in levels])
+    scale = np.asarray(geometry["spacing"], dtype=float) / 1000.0
+
+    collection = bpy.data.collections.new(f"Isodose {Path(file_path).stem}")
+    mesh_objects = []
+    for level, (vertices, faces) in zip(levels, surfaces):
+        if len(faces) == 0:
+            continue
+        name = f"Isodose {level:g}%"
+        mesh_obj = bpy.data.objects.new(name, create_mesh(name, (vertices - 1.0) * scale, faces))
+        mesh_obj["medblend_isodose_level"] = float(level)
+        mesh_obj["medblend_isodose_dose"] = reference_dose * level / 100.0
+        collection.objects.link(mesh_obj)
+        align_dose_object(mesh_obj, geometry)
+        mesh_objects.append(mesh_obj)
+
+    if not mesh_objects:
+        bpy.data.collections.remove(collection)
+        show_message_box("None of the isodose levels is reached in this dose grid.", "Error", "ERROR")
+        return False
+
+    bpy.context.scene.collection.children.link(collection)
+    bpy.context.view_layer.update()
+    bpy.context.view_layer.objects.active = mesh_objects[-1]
     return True
+
+
+def _same_grid(first: dict, second: dict, tolerance: float = 1e-3) -> bool:
+    import numpy as np
+
+    return (
+        tuple(first["shape"]) == tuple(second["shape"])
+        and np.allclose(first["origin"], second["origin"], atol=tolerance)
+        and np.allclose(first["basis"], second["basis"], atol=tolerance)
+    )
+
+
+def _common_dose_grid(geometries: list[dict]) -> dict:
+    """Return a grid with the first grid's orientation and spacing covering every grid."""
+
+    import numpy as np
+
+    reference = geometries[0]
+    inv_basis = np.linalg.inv(reference["basis"])
+    corners = np.asarray([[i, j, k] for i in (0, 1) for j in (0, 1) for k in (0, 1)], dtype=float)
+    extents = []
+    for geometry in geometries:
+        last_index = np.maximum(np.asarray(geometry["shape"], dtype=float) - 1.0, 0.0)
+        corner_mm = geometry["origin"] + (corners * last_index) @ geometry["basis"].T
+        extents.append((corner_mm - reference["origin"]) @ inv_basis.T)
+    extents = np.concatenate(extents)
+
+    # Snap to the reference lattice so its own voxels are not interpolated.
+    lower = np.floor(extents.min(axis=0) + 1e-3)
+    upper = np.ceil(extents.max(axis=0) - 1e-3)
+    common = dict(reference)
+    common["origin"] = reference["origin"] + reference["basis"] @ lower
+    common["shape"] = tuple(int(value) for value in upper - lower + 1)
+    return common
+
+
+def load_plan_sum(file_paths, lod_levels: int = 0, dose_threshold: float = 0.0) -> bool:
+    """Sum several RT Dose files (e.g. one per beam) into a single dose volume.
+
+    All files must share a frame of reference and dose units. Identical grids
+    are added directly; otherwise every dose is trilinearly resampled onto a
+    common grid with the first file's orientation and spacing that covers all
+    of them. Only the float32 sum and one source grid are held in memory.
+    """
+
+    file_paths = [Path(file_path) for file_path in file_paths]
+    if not file_paths:
+        show_message_box("Select at least one RT Dose file.", "Error", "ERROR")
+        return False
+
+    try:
+        import numpy as np
+    except Exception as exc:
+        show_message_box(f"numpy is required to load dose data: {exc}", "Missing Dependency", "ERROR")
+        return False
+
+    datasets = []
+    for file_path in file_paths:
+        dataset = read_dicom_header(file_path, specific_tags=None)
+        if dataset is None or not is_dose_file(dataset):
+            show_message_box(f"{file_path.name} is not an RT Dose file.", "Error", "ERROR")
+            return False
+        datasets.append(dataset)
+
+    geometries = [dose_grid_geometry(dataset) for dataset in datasets]
+    frame_uids = {geometry["frame_uid"] for geometry in geometries}
+    if len(frame_uids) > 1:
+        show_message_box("The selected dose files do not share a frame of reference.", "Error", "ERROR")
+        return False
+    dose_units = {str(getattr(dataset, "DoseUnits", "")).upper() for dataset in datasets}
+    if len(dose_units) > 1:
+        show_message_box(f"The selected dose files mix dose units: {', '.join(sorted(dose_units))}.", "Error", "ERROR")
+        return False
+
+    common = geometries[0]
+    if not all(_same_grid(common, geometry) for geometry in geometries[1:]):
+        common = _common_dose_grid(geometries)
+
+    try:
+        dose_sum = np.zeros(common["shape"], dtype=np.float32)
+        for file_path, dataset, geometry in zip(file_paths, datasets, geometries):
+            dose_matrix = read_dose_pixels(file_path, dataset)
+            if _same_grid(common, geometry):
+                dose_sum += dose_matrix
+            else:
+                trilinear_resample(
+                    dose_matrix,
+                    geometry["origin"],
+                    geometry["basis"],
+                    common["shape"],
+                    common["origin"],
+                    common["basis"],
+                    out=dose_sum,
+                    accumulate=True,
+                )
+            del dose_matrix
+    except Exception as exc:
+        show_message_box(f"Unable to sum dose grids: {exc}", "Error", "ERROR")
+        return False
+
+    return write_dose_volume(dose_sum, common, "dose_sum.vdb", lod_levels, dose_threshold)
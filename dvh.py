@@ -0,0 +1,220 @@
+"""Dose-volume histograms for the ROIs of an RT Structure Set."""
+
+from __future__ import annotations
+
+import csv
+from pathlib import Path
+from typing import Iterable, Optional
+
+import numpy as np
+import pydicom
+
+from .dicom_util import is_dose_file, is_structure_file, read_dicom_header
+from .dose import dose_grid_geometry, find_ct_anchor, read_dose_pixels
+from .resample import trilinear_resample
+from .structure import get_structure_frame_uid, rasterise_rois, resolve_structure_geometry, structure_roi_names
+
+
+# Rasterised ROI masks per ROI number, under a key of structure file and grid,
+# so recomputing against another dose grid or ROI subset only rasterises ROIs
+# not seen yet. Masks can be large, so only the latest structure/grid is kept.
+_ROI_MASK_CACHE: dict = {}
+
+
+def roi_voxel_indices(
+    masks: list[np.ndarray],
+    offsets: list[tuple[int, int, int]],
+    frame_shape: tuple[int, int, int],
+) -> list[np.ndarray]:
+    """Return the flat index into ``frame_shape`` of every voxel inside each cropped ROI mask."""
+
+    strides = np.asarray([frame_shape[1] * frame_shape[2], frame_shape[2], 1], dtype=np.int64)
+    return [(np.argwhere(mask) + np.asarray(offset, dtype=np.int64)) @ strides for mask, offset in zip(masks, offsets)]
+
+
+def compute_dvhs(dose: np.ndarray, roi_indices: list[np.ndarray], bin_width: float = 0.1) -> dict:
+    """Histogram the dose of every ROI in one pass.
+
+    ``roi_indices`` holds flat voxel indices into ``dose`` per ROI (see
+    :func:`roi_voxel_indices`). All ROI voxels are gathered once and binned
+    with a single ``np.bincount`` over ``roi * bins + dose_bin``. Returns
+    per-ROI ``differential`` and ``cumulative`` voxel counts (cumulative bin
+    ``b`` counts voxels receiving at least ``dose_bins[b]``) plus voxel
+    counts and mean/min/max dose.
+    """
+
+    roi_count = len(roi_indices)
+    voxel_counts = np.asarray([len(indices) for indices in roi_indices], dtype=np.int64)
+    flat_dose = np.asarray(dose, dtype=np.float32).reshape(-1)
+    if roi_count and voxel_counts.sum():
+        voxel_dose = np.maximum(flat_dose[np.concatenate(roi_indices)], 0.0)
+    else:
+        voxel_dose = np.zeros(0, dtype=np.float32)
+    labels = np.repeat(np.arange(roi_count, dtype=np.int64), voxel_counts)
+
+    # One bin past the maximum so every cumulative curve ends at zero.
+    bin_count = int(float(voxel_dose.max(initial=0.0)) // bin_width) + 2
+    dose_bins = np.minimum((voxel_dose / bin_width).astype(np.int64), bin_count - 1)
+    differential = np.bincount(labels * bin_count + dose_bins, minlength=roi_count * bin_count)
+    differential = differential.reshape(roi_count, bin_count)
+    cumulative = differential[:, ::-1].cumsum(axis=1)[:, ::-1]
+
+    mean = np.zeros(roi_count)
+    minimum = np.zeros(roi_count)
+    maximum = np.zeros(roi_count)
+    filled = voxel_counts > 0
+    if np.any(filled):
+        mean[filled] = np.bincount(labels, weights=voxel_dose, minlength=roi_count)[filled] / voxel_counts[filled]
+        starts = (np.cumsum(voxel_counts) - voxel_counts)[filled]
+        minimum[filled] = np.minimum.reduceat(voxel_dose, starts)
+        maximum[filled] = np.maximum.reduceat(voxel_dose, starts)
+
+    return {
+        "bin_width": float(bin_width),
+        "dose_bins": np.arange(bin_count) * float(bin_width),
+        "differential": differential,
+        "cumulative": cumulative,
+        "voxel_counts": voxel_counts,
+        "mean": mean,
+        "min": minimum,
+        "max": maximum,
+    }
+
+
+def dvh_metrics(
+    dvh: dict,
+    voxel_volume_cc: float,
+    d_percents: Iterable[float] = (98.0, 95.0, 50.0, 2.0),
+    v_doses: Iterable[float] = (20.0,),
+) -> list[dict]:
+    """Return per-ROI metrics: volume, mean/min/max dose, ``Dx`` (dose to the hottest x%) and ``Vx`` (% volume >= x).
+
+    ``Dx`` and ``Vx`` are read off the cumulative histogram, so they are
+    resolved to the histogram's bin width.
+    """
+
+    counts = dvh["voxel_counts"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fraction = np.where(counts[:, np.newaxis] > 0, dvh["cumulative"] / counts[:, np.newaxis], 0.0)
+    bin_count = fraction.shape[1]
+
+    columns = {
+        "Volume (cc)": counts * float(voxel_volume_cc),
+        "Dmean": dvh["mean"],
+        "Dmin": dvh["min"],
+        "Dmax": dvh["max"],
+    }
+    for percent in d_percents:
+        # Cumulative curves decrease, so this is the last bin still covering the fraction.
+        last_bin = np.maximum((fraction >= float(percent) / 100.0).sum(axis=1) - 1, 0)
+        columns[f"D{percent:g}"] = np.where(counts > 0, dvh["dose_bins"][last_bin], 0.0)
+    for dose_level in v_doses:
+        first_bin = int(np.ceil(float(dose_level) / dvh["bin_width"] - 1e-6))
+        columns[f"V{dose_level:g}"] = fraction[:, first_bin] * 100.0 if first_bin < bin_count else np.zeros(len(counts))
+
+    return [{name: float(values[roi]) for name, values in columns.items()} for roi in range(len(counts))]
+
+
+def compute_structure_dvhs(
+    structure_path: Path,
+    dose_path: Path,
+    bin_width: float = 0.1,
+    roi_numbers: Optional[Iterable[int]] = None,
+    max_workers: Optional[int] = None,
+) -> tuple[list[str], dict, float]:
+    """Return ``(names, dvh, voxel_volume_cc)`` for an RT Structure Set against an RT Dose file.
+
+    ROIs are rasterised with :func:`structure.rasterise_rois` on the same
+    grid as an imported structure set and cached per ROI. The dose is
+    resampled only over the box enclosing all ROIs before
+    :func:`compute_dvhs` bins it. Raises ``ValueError`` for unsuitable files.
+    """
+
+    structure_path = Path(structure_path)
+    dicom_structure = pydicom.dcmread(structure_path)
+    if not is_structure_file(dicom_structure):
+        raise ValueError("Selected file is not an RT Structure Set.")
+    # Header only: the pixel payload is memory-mapped by read_dose_pixels.
+    dose_dataset = read_dicom_header(Path(dose_path), specific_tags=None)
+    if dose_dataset is None or not is_dose_file(dose_dataset):
+        raise ValueError("Selected file is not an RT Dose file.")
+
+    ct_anchor = find_ct_anchor(get_structure_frame_uid(dicom_structure))
+    geometry = resolve_structure_geometry(dicom_structure, structure_path.parent, ct_anchor)
+    frame_shape = (geometry["num_slices"], geometry["rows"], geometry["cols"])
+    cache_key = (
+        str(structure_path.resolve()),
+        structure_path.stat().st_mtime_ns,
+        frame_shape,
+        tuple(np.round(geometry["origin"], 3)),
+        tuple(np.round(geometry["vdb_basis"], 4).ravel()),
+    )
+    roi_masks = _ROI_MASK_CACHE.get(cache_key)
+    if roi_masks is None:
+        _ROI_MASK_CACHE.clear()
+        roi_masks = _ROI_MASK_CACHE[cache_key] = {}
+
+    roi_contours = getattr(dicom_structure, "ROIContourSequence", [])
+    wanted = [int(getattr(roi_contour, "ReferencedROINumber", -1)) for roi_contour in roi_contours]
+    if roi_numbers is not None:
+        selected = {int(number) for number in roi_numbers}
+        wanted = [number for number in wanted if number in selected]
+    missing = [number for number in wanted if number not in roi_masks]
+    if missing:
+        roi_masks.update(
+            rasterise_rois(dicom_structure, geometry, margin=0, max_workers=max_workers, roi_numbers=missing)
+        )
+
+    roi_names = structure_roi_names(dicom_structure)
+    rasterised = [(number, roi_masks[number]) for number in wanted if roi_masks.get(number) is not None]
+    masks = [mask for _number, (mask, _offset) in rasterised]
+    offsets = [offset for _number, (_mask, offset) in rasterised]
+    names = [roi_names.get(number, f"ROI_{number}") for number, _result in rasterised]
+    if not masks:
+        raise ValueError("No contour masks were generated from this RT Structure Set.")
+
+    # Only the box enclosing every ROI needs dose values.
+    lower = np.min(np.asarray(offsets), axis=0)
+    upper = np.max([np.asarray(offset) + mask.shape for mask, offset in zip(masks, offsets)], axis=0)
+    box_shape = tuple(int(value) for value in upper - lower)
+    dose_geometry = dose_grid_geometry(dose_dataset)
+    box_dose = trilinear_resample(
+        read_dose_pixels(Path(dose_path), dose_dataset),
+        dose_geometry["origin"],
+        dose_geometry["basis"],
+        box_shape,
+        geometry["origin"] + geometry["vdb_basis"] @ lower,
+        geometry["vdb_basis"],
+        max_workers=max_workers,
+    )
+
+    box_offsets = [tuple(int(value) for value in np.asarray(offset) - lower) for offset in offsets]
+    dvh = compute_dvhs(box_dose, roi_voxel_indices(masks, box_offsets, box_shape), bin_width)
+    dvh["units"] = str(getattr(dose_dataset, "DoseUnits", "GY")).upper()
+    voxel_volume_cc = abs(float(np.linalg.det(geometry["vdb_basis"]))) / 1000.0
+    return names, dvh, voxel_volume_cc
+
+
+def write_dvh_csv(
+    file_path: Path,
+    names: list[str],
+    metrics: list[dict],
+    dvh: Optional[dict] = None,
+) -> None:
+    """Write one metrics row per ROI, then the cumulative curves (% volume per dose bin) when ``dvh`` is given."""
+
+    with open(file_path, "w", newline="", encoding="utf-8") as handle:
+        writer = csv.writer(handle)
+        columns = list(metrics[0]) if metrics else []
+        writer.writerow(["ROI"] + columns)
+        for name, roi_metrics in zip(names, metrics):
+            writer.writerow([name] + [f"{roi_metrics[column]:.4f}" for column in columns])
+
+        if dvh is None:
+            return
+        counts = np.maximum(dvh["voxel_counts"], 1)[:, np.newaxis]
+        volume_percent = dvh["cumulative"] * 100.0 / counts
+        writer.writerow([])
+        writer.writerow([f"Dose ({dvh.get('units', 'GY')})"] + list(names))
+        for bin_index, dose_value in enumerate(dvh["dose_bins"]):
+            writer.writerow([f"{dose_value:.4f}"] + [f"{value:.3f}" for value in volume_percent[:, bin_index]])
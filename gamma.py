@@ -0,0 +1,228 @@
+"""3D gamma index comparison of two RT Dose distributions."""
+
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional, Tuple
+
+import numpy as np
+
+from .dicom_util import default_worker_count, is_dose_file, read_dicom_header
+from .dose import align_dose_object, dose_grid_geometry, read_dose_pixels
+from .node_groups import apply_dicom_shader
+from .resample import trilinear_resample
+from .ui_utils import show_message_box
+from .volume_utils import write_vdb_volume
+
+
+# Value (and grid background) of reference voxels below the low-dose cutoff,
+# kept apart from a perfect gamma of 0.
+GAMMA_UNEVALUATED = -1.0
+
+
+def gamma_stencil(
+    fine_basis: np.ndarray,
+    search_radius_mm: float,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Return ``(offsets, distances_mm)`` of every fine-grid step within ``search_radius_mm``, nearest first.
+
+    ``fine_basis`` holds the mm step of each fine-grid index axis as columns.
+    """
+
+    fine_basis = np.asarray(fine_basis, dtype=float)
+    reach = np.ceil(search_radius_mm / np.linalg.norm(fine_basis, axis=0) - 1e-9).astype(int)
+    axes = [np.arange(-value, value + 1) for value in reach]
+    offsets = np.stack(np.meshgrid(*axes, indexing="ij"), axis=-1).reshape(-1, 3)
+    distances = np.linalg.norm(offsets @ fine_basis.T, axis=1)
+    keep = distances <= search_radius_mm + 1e-9
+    order = np.argsort(distances[keep], kind="stable")
+    return offsets[keep][order], distances[keep][order]
+
+
+def compute_gamma(
+    reference: np.ndarray,
+    reference_geometry: dict,
+    evaluated: np.ndarray,
+    evaluated_geometry: dict,
+    dose_percent: float = 3.0,
+    dta_mm: float = 3.0,
+    local: bool = False,
+    cutoff_percent: float = 10.0,
+    resolution: int = 3,
+    max_gamma: float = 2.0,
+    chunk_planes: int = 8,
+    max_workers: Optional[int] = None,
+) -> Tuple[np.ndarray, dict]:
+    """Return ``(gamma, summary)`` comparing ``evaluated`` against ``reference`` on the reference grid.
+
+    The evaluated dose is resampled once onto a grid ``resolution`` times
+    finer than the reference grid. Each reference voxel at or above
+    ``cutoff_percent`` of the maximum reference dose then walks a stencil of
+    fine-grid offsets sorted by distance, stopping once the distance term
+    alone exceeds its best gamma. Dose differences are normalised to
+    ``dose_percent`` of the maximum reference dose, or of the local
+    reference dose with ``local``. Gamma is capped at ``max_gamma`` (the
+    search radius is ``max_gamma * dta_mm``); voxels below the cutoff are
+    ``NaN``. Reference planes are processed in chunks on ``max_workers``
+    threads.
+    """
+
+    reference = np.asarray(reference, dtype=np.float32)
+    resolution = max(1, int(resolution))
+    reference_max = float(reference.max(initial=0.0))
+    gamma = np.full(reference.shape, np.nan, dtype=np.float32)
+    if reference_max <= 0:
+        raise ValueError("The reference dose grid is empty.")
+    cutoff = max(float(cutoff_percent) / 100.0 * reference_max, float(np.finfo(np.float32).tiny))
+    global_dd = float(dose_percent) / 100.0 * reference_max
+
+    # The fine grid only needs to cover reference voxels above the cutoff.
+    above = reference >= cutoff
+    box_lower = np.asarray([np.flatnonzero(above.any(axis=other))[0] for other in ((1, 2), (0, 2), (0, 1))])
+    box_upper = np.asarray([np.flatnonzero(above.any(axis=other))[-1] for other in ((1, 2), (0, 2), (0, 1))])
+    del above
+
+    reference_basis = np.asarray(reference_geometry["basis"], dtype=float)
+    fine_basis = reference_basis / resolution
+    offsets, distances = gamma_stencil(fine_basis, max_gamma * dta_mm)
+    # Padding the fine grid by the stencil reach keeps every lookup in bounds.
+    pad = np.abs(offsets).max(axis=0)
+    fine_shape = tuple(int(value) for value in (box_upper - box_lower) * resolution + 1 + 2 * pad)
+    fine_dose = trilinear_resample(
+        evaluated,
+        evaluated_geometry["origin"],
+        evaluated_geometry["basis"],
+        fine_shape,
+        np.asarray(reference_geometry["origin"], dtype=float) + reference_basis @ box_lower - fine_basis @ pad,
+        fine_basis,
+        fill_value=np.nan,
+        max_workers=max_workers,
+    ).reshape(-1)
+    fine_strides = np.asarray([fine_shape[1] * fine_shape[2], fine_shape[2], 1], dtype=np.int64)
+    offset_steps = offsets @ fine_strides
+    distance_terms = (distances / dta_mm) ** 2
+    max_gamma_sq = float(max_gamma) ** 2
+
+    def gamma_chunk(first_plane: int) -> None:
+        block = reference[first_plane : first_plane + chunk_planes]
+        voxels = np.argwhere(block >= cutoff)
+        if voxels.size == 0:
+            return
+        reference_values = block[tuple(voxels.T)]
+        voxels[:, 0] += first_plane
+        base = ((voxels - box_lower) * resolution + pad) @ fine_strides
+        if local:
+            inv_dd_sq = (1.0 / (float(dose_percent) / 100.0 * reference_values) ** 2).astype(np.float32)
+        else:
+            inv_dd_sq = np.full(len(voxels), 1.0 / global_dd**2, dtype=np.float32)
+
+        best = np.full(len(voxels), max_gamma_sq, dtype=np.float32)
+        active = np.arange(len(voxels))
+        for distance_term, step in zip(distance_terms, offset_steps):
+            # Offsets are sorted by distance: farther ones cannot beat a smaller gamma.
+            active = active[best[active] > distance_term]
+            if active.size == 0:
+                break
+            difference = fine_dose[base[active] + step] - reference_values[active]
+            candidate = distance_term + difference * difference * inv_dd_sq[active]
+            # fmin skips NaN lookups outside the evaluated grid.
+            best[active] = np.fmin(best[active], candidate)
+
+        gamma[tuple(voxels.T)] = np.sqrt(best)
+
+    chunk_starts = range(int(box_lower[0]), int(box_upper[0]) + 1, chunk_planes)
+    workers = max_workers or default_worker_count()
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(gamma_chunk, chunk_starts))
+    else:
+        for first_plane in chunk_starts:
+            gamma_chunk(first_plane)
+
+    evaluated_gamma = gamma[~np.isnan(gamma)]
+    passed = int(np.count_nonzero(evaluated_gamma <= 1.0))
+    summary = {
+        "evaluated_voxels": int(evaluated_gamma.size),
+        "passed_voxels": passed,
+        "pass_rate": 100.0 * passed / evaluated_gamma.size if evaluated_gamma.size else 0.0,
+        "mean_gamma": float(evaluated_gamma.mean()) if evaluated_gamma.size else 0.0,
+        "max_gamma": float(evaluated_gamma.max()) if evaluated_gamma.size else 0.0,
+        "criteria": f"{dose_percent:g}%/{dta_mm:g}mm {'local' if local else 'global'}, {cutoff_percent:g}% cutoff",
+    }
+    return gamma, summary
+
+
+def _read_dose_grid(file_path: Path):
+    dataset = read_dicom_header(file_path, specific_tags=None)
+    if dataset is None or not is_dose_file(dataset):
+        raise ValueError(f"{Path(file_path).name} is not an RT Dose file.")
+    return dataset, read_dose_pixels(file_path, dataset), dose_grid_geometry(dataset)
+
+
+def load_gamma(
+    reference_path: Path,
+    evaluated_path: Path,
+    dose_percent: float = 3.0,
+    dta_mm: float = 3.0,
+    local: bool = False,
+    cutoff_percent: float = 10.0,
+    resolution: int = 3,
+) -> Optional[dict]:
+    """Import the gamma map of ``evaluated_path`` against ``reference_path`` as a VDB volume.
+
+    The volume sits on the reference dose grid, aligned like an imported
+    dose. Voxels below the low-dose cutoff hold :data:`GAMMA_UNEVALUATED`
+    and stay inactive; every evaluated voxel, gamma 0 included, is active.
+    Returns the pass-rate summary of :func:`compute_gamma` (also stored on
+    the object), or ``None`` on failure.
+    """
+
+    try:
+        reference_dataset, reference, reference_geometry = _read_dose_grid(Path(reference_path))
+        evaluated_dataset, evaluated, evaluated_geometry = _read_dose_grid(Path(evaluated_path))
+    except Exception as exc:
+        show_message_box(f"Unable to read dose grids: {exc}", "Error", "ERROR")
+        return None
+
+    frame_uids = {reference_geometry["frame_uid"], evaluated_geometry["frame_uid"]} - {""}
+    if len(frame_uids) > 1:
+        show_message_box("The dose files do not share a frame of reference.", "Error", "ERROR")
+        return None
+    units = {str(getattr(dataset, "DoseUnits", "")).upper() for dataset in (reference_dataset, evaluated_dataset)}
+    if len(units) > 1:
+        show_message_box(f"The dose files mix dose units: {', '.join(sorted(units))}.", "Error", "ERROR")
+        return None
+
+    try:
+        gamma, summary = compute_gamma(
+            reference,
+            reference_geometry,
+            evaluated,
+            evaluated_geometry,
+            dose_percent=dose_percent,
+            dta_mm=dta_mm,
+            local=local,
+            cutoff_percent=cutoff_percent,
+            resolution=resolution,
+        )
+    except Exception as exc:
+        show_message_box(f"Unable to compute gamma: {exc}", "Error", "ERROR")
+        return None
+
+    # Unevaluated voxels become the inactive background.
+    result = write_vdb_volume(
+        np.nan_to_num(gamma, nan=GAMMA_UNEVALUATED),
+        reference_geometry["spacing"],
+        "gamma.vdb",
+        background=GAMMA_UNEVALUATED,
+    )
+    if not result:
+        return None
+    _output_path, gamma_object = result
+    align_dose_object(gamma_object, reference_geometry)
+    for key in ("pass_rate", "evaluated_voxels", "passed_voxels", "mean_gamma", "max_gamma", "criteria"):
+        gamma_object[f"medblend_gamma_{key}"] = summary[key]
+    gamma_object["medblend_gamma_unevaluated"] = GAMMA_UNEVALUATED
+    apply_dicom_shader("Dose Material")
+    return summary
@@ -4,11 +4,15 @@ from __future__ import annotations
 
 import os
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Sequence
 
 import bpy
 
 
+# Map Range nodes inserted by :func:`apply_windowed_shader`.
+WINDOW_NODE_NAME = "MedBlend Window"
+
+
 def _blend_library_path() -> Path:
     current_path = Path(bpy.path.abspath(os.path.dirname(__file__)))
     return current_path / "assets" / "MedBlend_Assets.blend"
@@ -19,14 +23,15 @@ def append_item_from_blend(file_path: Path, item_type: str, item_name: str) -> N
     bpy.ops.wm.append(directory=directory + os.sep, filename=item_name)
 
 
-def apply_dicom_shader(shader_name: str) -> bool:
-    """Attach the requested shader to the active object, appending when needed."""
+def apply_dicom_shader(shader_name: str, obj: Optional[bpy.types.Object] = None) -> bool:
+    """Attach the requested shader to ``obj`` (default: the active object), appending when needed."""
 
     blend_path = _blend_library_path()
     if shader_name not in bpy.data.materials:
         append_item_from_blend(blend_path, "Material", shader_name)
 
-    obj = bpy.context.object
+    if obj is None:
+        obj = bpy.context.object
     if obj and obj.data and hasattr(obj.data, "materials"):
         obj.data.materials.append(bpy.data.materials[shader_name])
         return True
@@ -34,6 +39,64 @@ def apply_dicom_shader(shader_name: str) -> bool:
     return False
 
 
+def _density_outputs(node_tree: bpy.types.NodeTree) -> list:
+    outputs = []
+    for node in node_tree.nodes:
+        if node.bl_idname == "ShaderNodeVolumeInfo":
+            outputs.append(node.outputs["Density"])
+        elif node.bl_idname == "ShaderNodeAttribute" and node.attribute_name == "density":
+            outputs.append(node.outputs["Fac"])
+    return outputs
+
+
+def set_material_window(material: bpy.types.Material, value_range: Sequence[float]) -> None:
+    """Point every window node of ``material`` at ``value_range`` (modality units)."""
+
+    low, high = (float(value) for value in value_range)
+    for node in material.node_tree.nodes:
+        if node.name.startswith(WINDOW_NODE_NAME):
+            node.inputs["From Min"].default_value = low
+            node.inputs["From Max"].default_value = high if high > low else low + 1.0
+
+
+def apply_windowed_shader(
+    shader_name: str,
+    value_range: Sequence[float],
+    obj: Optional[bpy.types.Object] = None,
+) -> bool:
+    """Attach a copy of ``shader_name`` that maps ``value_range`` of the density onto ``[0, 1]``.
+
+    The shared material expects unit density, so each object gets its own
+    copy with a clamped Map Range node inserted after every density output.
+    """
+
+    blend_path = _blend_library_path()
+    if shader_name not in bpy.data.materials:
+        append_item_from_blend(blend_path, "Material", shader_name)
+
+    if obj is None:
+        obj = bpy.context.object
+    if not (obj and obj.data and hasattr(obj.data, "materials")):
+        return False
+
+    material = bpy.data.materials[shader_name].copy()
+    material.name = f"{shader_name} {obj.name}"
+    node_tree = material.node_tree
+    for output in _density_outputs(node_tree):
+        targets = [link.to_socket for link in node_tree.links if link.from_socket == output]
+        window = node_tree.nodes.new("ShaderNodeMapRange")
+        window.name = WINDOW_NODE_NAME
+        window.label = "Window"
+        window.clamp = True
+        window.location = (output.node.location[0] + 200.0, output.node.location[1] - 200.0)
+        node_tree.links.new(output, window.inputs["Value"])
+        for target in targets:
+            node_tree.links.new(window.outputs["Result"], target)
+    set_material_window(material, value_range)
+    obj.data.materials.append(material)
+    return True
+
+
 def apply_proton_spots_geo_nodes(node_tree_name: str = "Proton_Spots") -> Optional[bpy.types.Modifier]:
     """Ensure the proton geometry nodes modifier is present on the active object."""
 
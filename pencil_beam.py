@@ -0,0 +1,298 @@
+"""Analytical pencil-beam dose engine for quick-look proton plan dose."""
+
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from itertools import product
+from pathlib import Path
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+import pydicom
+
+from .ct import AIR_HU, read_ct_hu
+from .dicom_util import default_worker_count
+from .dose import ct_grid_geometry, find_ct_anchor, write_dose_volume
+from .plan import beam_spot_table, is_proton_plan
+from .resample import trilinear_resample
+from .ui_utils import show_message_box
+
+
+# Bragg-Kleeman range-energy relation in water, R[mm] = ALPHA * E[MeV] ** P.
+_BRAGG_KLEEMAN_ALPHA = 0.022
+_BRAGG_KLEEMAN_P = 1.77
+_ENERGY_TABLE_MEV = np.linspace(1.0, 300.0, 600)
+_RANGE_TABLE_MM = _BRAGG_KLEEMAN_ALPHA * _ENERGY_TABLE_MEV**_BRAGG_KLEEMAN_P
+
+# Piecewise linear HU -> stopping power relative to water.
+_HU_POINTS = np.asarray([-1000.0, -200.0, -100.0, 0.0, 100.0, 1500.0, 3000.0])
+_RSP_POINTS = np.asarray([0.001, 0.80, 0.93, 1.0, 1.07, 1.85, 2.50])
+
+# Range straggling width as a fraction of range.
+_STRAGGLING_FRACTION = 0.011
+# Empirical multiple Coulomb scattering width at the end of range, sigma[mm] = SCALE * R[mm] ** POWER.
+_MCS_SCALE = 0.033
+_MCS_POWER = 0.94
+# 1 MeV deposited in 1 mm^3 of water is 1.602e-7 Gy.
+_MEV_PER_MM3_TO_GY = 1.602176634e-7
+
+
+def proton_range_mm(energy_mev) -> np.ndarray:
+    """Return the water range (mm) for proton energies (MeV) from the energy-range table."""
+
+    return np.interp(np.asarray(energy_mev, dtype=float), _ENERGY_TABLE_MEV, _RANGE_TABLE_MM)
+
+
+def hu_to_rsp(hu: np.ndarray) -> np.ndarray:
+    """Convert Hounsfield units to stopping power relative to water."""
+
+    return np.interp(hu, _HU_POINTS, _RSP_POINTS).astype(np.float32)
+
+
+@lru_cache(maxsize=1)
+def _bragg_table() -> Tuple[np.ndarray, np.ndarray]:
+    step = 1e-3
+    edges = np.arange(0.0, 1.3 + step, step)
+    # Exact cell averages of the Bragg-Kleeman curve (1 - u) ** (1 / p - 1) / p, whose integral over [0, 1] is 1.
+    remaining = np.clip(1.0 - edges, 0.0, None) ** (1.0 / _BRAGG_KLEEMAN_P)
+    curve = (remaining[:-1] - remaining[1:]) / step
+    offsets = np.arange(-4 * _STRAGGLING_FRACTION, 4 * _STRAGGLING_FRACTION + step, step)
+    kernel = np.exp(-0.5 * (offsets / _STRAGGLING_FRACTION) ** 2)
+    curve = np.convolve(curve, kernel / kernel.sum(), mode="same")
+    return (edges[:-1] + edges[1:]) / 2.0, curve.astype(np.float32)
+
+
+def bragg_curve(relative_depth) -> np.ndarray:
+    """Return the straggled depth-energy deposition per unit ``depth / range`` (area 1 over a full stop)."""
+
+    centres, curve = _bragg_table()
+    return np.interp(relative_depth, centres, curve, left=curve[0], right=0.0).astype(np.float32)
+
+
+def _scatter_sigma(water_depth: np.ndarray, range_mm: float, spot_sigma_mm: float) -> np.ndarray:
+    relative = np.clip(water_depth / range_mm, 0.0, 1.0)
+    scatter = _MCS_SCALE * range_mm**_MCS_POWER * relative**1.5
+    return np.sqrt(spot_sigma_mm**2 + scatter**2)
+
+
+def beam_axes(gantry_angle: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Return the patient-space ``(direction, x, y)`` unit axes of a beam (head first supine, couch at 0)."""
+
+    angle = np.deg2rad(float(gantry_angle))
+    direction = np.asarray([-np.sin(angle), np.cos(angle), 0.0])
+    x_axis = np.asarray([np.cos(angle), np.sin(angle), 0.0])
+    y_axis = np.asarray([0.0, 0.0, 1.0])
+    return direction, x_axis, y_axis
+
+
+def beam_dose(
+    hu: np.ndarray,
+    ct_geometry: dict,
+    spots: np.ndarray,
+    gantry_angle: float,
+    isocenter_mm: Iterable[float],
+    grid_spacing_mm: float = 3.0,
+    spot_sigma_mm: float = 4.0,
+    protons_per_weight: float = 1e9,
+    max_workers: Optional[int] = None,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Return ``(dose, origin, basis)`` of one beam on a beam-aligned grid (axis 0 along the beam).
+
+    The CT is resampled onto the beam grid and converted to water-equivalent
+    depth by accumulating stopping power along axis 0. Spots of one energy
+    layer share a depth-dose lookup; each spot's Gaussian lateral spread
+    grows with multiple scattering along its central axis, so a plane's
+    fluence is one ``(x, spots) @ (spots, y)`` product per layer. Planes
+    are processed on ``max_workers`` threads. ``spots`` is a
+    :data:`plan.SPOT_DTYPE` table, weights are scaled by
+    ``protons_per_weight`` and dose is in Gy (water, no nuclear halo).
+    """
+
+    direction, x_axis, y_axis = beam_axes(gantry_angle)
+    isocenter = np.asarray(isocenter_mm, dtype=float)
+    spot_x = spots["x"].astype(float) * 1000.0
+    spot_y = spots["y"].astype(float) * 1000.0
+    energy = spots["energy"].astype(float) * 1000.0
+    weight = spots["weight"].astype(np.float32) * np.float32(protons_per_weight)
+    ranges = proton_range_mm(energy)
+
+    # Depth spans the CT; laterally the grid covers the spots plus 3 sigma.
+    ct_shape = np.asarray(ct_geometry["shape"], dtype=float)
+    corners = ct_geometry["origin"] + (np.asarray(list(product((0, 1), repeat=3))) * (ct_shape - 1)) @ np.asarray(
+        ct_geometry["basis"]
+    ).T
+    depths = (corners - isocenter) @ direction
+    margin = 3.0 * float(_scatter_sigma(np.float64(ranges.max()), float(ranges.max()), spot_sigma_mm))
+    lower = np.asarray([depths.min(), spot_x.min() - margin, spot_y.min() - margin])
+    upper = np.asarray([depths.max(), spot_x.max() + margin, spot_y.max() + margin])
+    shape = tuple(int(value) for value in np.floor((upper - lower) / grid_spacing_mm) + 1)
+    basis = np.column_stack((direction, x_axis, y_axis)) * grid_spacing_mm
+    origin = isocenter + np.column_stack((direction, x_axis, y_axis)) @ lower
+
+    hu_beam = trilinear_resample(
+        hu,
+        ct_geometry["origin"],
+        ct_geometry["basis"],
+        shape,
+        origin,
+        basis,
+        fill_value=AIR_HU,
+        max_workers=max_workers,
+    )
+    rsp = hu_to_rsp(hu_beam)
+    del hu_beam
+    # Water-equivalent depth at each voxel centre.
+    water_depth = (np.cumsum(rsp, axis=0) - 0.5 * rsp) * np.float32(grid_spacing_mm)
+    del rsp
+    shallowest = water_depth.reshape(shape[0], -1).min(axis=1)
+
+    x_coords = (lower[1] + np.arange(shape[1]) * grid_spacing_mm).astype(np.float32)
+    y_coords = (lower[2] + np.arange(shape[2]) * grid_spacing_mm).astype(np.float32)
+    column_x = np.clip(np.rint((spot_x - lower[1]) / grid_spacing_mm).astype(np.int64), 0, shape[1] - 1)
+    column_y = np.clip(np.rint((spot_y - lower[2]) / grid_spacing_mm).astype(np.int64), 0, shape[2] - 1)
+    dose = np.zeros(shape, dtype=np.float32)
+    layer_energies, layer_of_spot = np.unique(energy, return_inverse=True)
+
+    def layer_planes(layer: dict, first_plane: int, stop_plane: int) -> None:
+        for plane in range(first_plane, stop_plane):
+            sigma = layer["sigma"][plane][:, np.newaxis]
+            norm = np.float32(1.0 / np.sqrt(2.0 * np.pi)) / sigma
+            x_profile = norm * np.exp(-0.5 * ((x_coords - layer["x"][:, np.newaxis]) / sigma) ** 2)
+            y_profile = norm * np.exp(-0.5 * ((y_coords - layer["y"][:, np.newaxis]) / sigma) ** 2)
+            fluence = (x_profile * layer["weight"][:, np.newaxis]).T @ y_profile
+            depth_dose = bragg_curve(water_depth[plane] / layer["range"])
+            dose[plane] += layer["scale"] * depth_dose * fluence
+
+    workers = max_workers or default_worker_count()
+    chunk_planes = max(1, -(-shape[0] // (4 * workers)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for layer_index, layer_energy in enumerate(layer_energies):
+            selected = layer_of_spot == layer_index
+            layer_range = float(ranges[selected][0])
+            # Depth-dose ends within 1.3 ranges; deeper planes get nothing from this layer.
+            stop = int(np.searchsorted(shallowest, 1.3 * layer_range))
+            if stop == 0:
+                continue
+            axis_depth = water_depth[:stop, column_x[selected], column_y[selected]]
+            layer = {
+                "x": spot_x[selected].astype(np.float32),
+                "y": spot_y[selected].astype(np.float32),
+                "weight": weight[selected],
+                "range": np.float32(layer_range),
+                "sigma": _scatter_sigma(axis_depth, layer_range, spot_sigma_mm).astype(np.float32),
+                "scale": np.float32(_MEV_PER_MM3_TO_GY * layer_energy / layer_range),
+            }
+            list(
+                executor.map(
+                    lambda first: layer_planes(layer, first, min(first + chunk_planes, stop)),
+                    range(0, stop, chunk_planes),
+                )
+            )
+
+    return dose, origin, basis
+
+
+def _output_geometry(ct_geometry: dict, grid_spacing_mm: float) -> dict:
+    basis = np.asarray(ct_geometry["basis"], dtype=float)
+    extent = (np.asarray(ct_geometry["shape"]) - 1) * np.linalg.norm(basis, axis=0)
+    geometry = dict(ct_geometry)
+    geometry["shape"] = tuple(int(value) for value in np.floor(extent / grid_spacing_mm + 1e-6) + 1)
+    geometry["basis"] = basis / np.linalg.norm(basis, axis=0) * grid_spacing_mm
+    geometry["spacing"] = [float(grid_spacing_mm)] * 3
+    return geometry
+
+
+def load_pencil_beam_dose(
+    file_path: Path,
+    grid_spacing_mm: float = 3.0,
+    spot_sigma_mm: float = 4.0,
+    protons_per_weight: float = 1e9,
+    per_beam: bool = False,
+    lod_levels: int = 0,
+    dose_threshold: float = 0.01,
+) -> bool:
+    """Compute the dose of an RT Ion plan on its imported CT and import it like an RT Dose grid.
+
+    Spots come from :func:`plan.beam_spot_table`, HU from the imported CT
+    with the plan's frame of reference (:func:`ct.read_ct_hu` refuses CTs
+    that do not store HU). Dose is computed per beam with
+    :func:`beam_dose` and summed on a grid with the CT's orientation and
+    ``grid_spacing_mm`` spacing; ``per_beam`` imports one volume per beam
+    instead of the sum.
+    """
+
+    try:
+        dataset = pydicom.dcmread(file_path)
+    except Exception as exc:
+        show_message_box(f"Unable to read file: {exc}", "Error", "ERROR")
+        return False
+
+    if not is_proton_plan(dataset):
+        show_message_box("Selected file is not an RT Ion proton plan.", "Error", "ERROR")
+        return False
+
+    ct_obj = find_ct_anchor(str(getattr(dataset, "FrameOfReferenceUID", "")))
+    ct_geometry = ct_grid_geometry(ct_obj) if ct_obj else None
+    if ct_geometry is None:
+        show_message_box("Import the planning CT of this plan before computing dose.", "Error", "ERROR")
+        return False
+
+    try:
+        hu = read_ct_hu(ct_obj)
+    except Exception as exc:
+        show_message_box(f"Unable to read the imported CT: {exc}", "Error", "ERROR")
+        return False
+
+    output_geometry = _output_geometry(ct_geometry, grid_spacing_mm)
+    total = np.zeros(output_geometry["shape"], dtype=np.float32)
+    success = True
+    computed_beams = 0
+    for beam_index, beam in enumerate(getattr(dataset, "IonBeamSequence", [])):
+        control_points = getattr(beam, "IonControlPointSequence", None)
+        if not control_points:
+            continue
+        spots = beam_spot_table(beam_index, control_points)
+        if len(spots) == 0:
+            continue
+
+        try:
+            dose, origin, basis = beam_dose(
+                hu,
+                ct_geometry,
+                spots,
+                float(getattr(control_points[0], "GantryAngle", 0.0)),
+                getattr(control_points[0], "IsocenterPosition", (0.0, 0.0, 0.0)),
+                grid_spacing_mm=grid_spacing_mm,
+                spot_sigma_mm=spot_sigma_mm,
+                protons_per_weight=protons_per_weight,
+            )
+            if per_beam:
+                total.fill(0.0)
+            trilinear_resample(
+                dose,
+                origin,
+                basis,
+                output_geometry["shape"],
+                output_geometry["origin"],
+                output_geometry["basis"],
+                out=total,
+                accumulate=True,
+            )
+        except Exception as exc:
+            show_message_box(f"Unable to compute dose for beam {beam_index}: {exc}", "Error", "ERROR")
+            success = False
+            continue
+
+        computed_beams += 1
+        if per_beam:
+            success &= write_dose_volume(
+                total, output_geometry, f"pencil_beam_dose_{beam_index}.vdb", lod_levels, dose_threshold
+            )
+
+    if computed_beams == 0:
+        show_message_box("No proton beam spot data could be used from this RT Ion plan.", "Error", "ERROR")
+        return False
+    if not per_beam:
+        success &= write_dose_volume(total, output_geometry, "pencil_beam_dose.vdb", lod_levels, dose_threshold)
+    return success
@@ -4,9 +4,9 @@ from __future__ import annotations
 
 import math
 from pathlib import Path
-from typing import Iterable
 
 import bpy
+import numpy as np
 import pydicom
 
 from .blender_utils import add_data_fields, create_object
@@ -32,14 +32,74 @@ def is_photon_plan(ds: pydicom.Dataset) -> bool:
         return False
 
 
-def _as_float_list(values) -> list[float]:
-    if values is None:
-        return []
-    if isinstance(values, (str, bytes)):
-        return []
-    if isinstance(values, Iterable):
-        return [float(value) for value in values]
-    return [float(values)]
+# One row per scan spot; positions in m at isocentre, energy in GeV, layer
+# counted over the spot-bearing (even) control points.
+SPOT_DTYPE = np.dtype(
+    [
+        ("x", np.float32),
+        ("y", np.float32),
+        ("energy", np.float32),
+        ("weight", np.float32),
+        ("layer", np.int32),
+        ("control_point", np.int32),
+    ]
+)
+
+
+def _as_float_array(values) -> np.ndarray:
+    if values is None or isinstance(values, (str, bytes)):
+        return np.zeros(0, dtype=float)
+    return np.atleast_1d(np.asarray(values, dtype=float))
+
+
+def beam_spot_table(beam_index: int, control_points) -> np.ndarray:
+    """Return the scan spots of one ion beam as a :data:`SPOT_DTYPE` structured array.
+
+    Spots come from every second control point (the start of each energy
+    layer); control points with missing or inconsistent spot data are
+    reported and skipped.
+    """
+
+    tables = []
+    for idx in range(0, len(control_points), 2):
+        control_point = control_points[idx]
+        positions = _as_float_array(getattr(control_point, "ScanSpotPositionMap", None))
+        weights = _as_float_array(getattr(control_point, "ScanSpotMetersetWeights", None))
+        if not positions.size or not weights.size:
+            show_message_box(
+                f"Beam {beam_index} control point {idx} is missing spot positions or weights.",
+                "Error",
+                "ERROR",
+            )
+            continue
+        if positions.size % 2 != 0:
+            show_message_box(
+                f"Beam {beam_index} control point {idx} has an odd number of spot positions.",
+                "Error",
+                "ERROR",
+            )
+            continue
+
+        spot_count = positions.size // 2
+        if weights.size < spot_count:
+            show_message_box(
+                f"Beam {beam_index} control point {idx} has fewer weights than positions.",
+                "Error",
+                "ERROR",
+            )
+            continue
+
+        table = np.empty(spot_count, dtype=SPOT_DTYPE)
+        positions = positions.reshape(spot_count, 2) / 1000.0
+        table["x"] = positions[:, 0]
+        table["y"] = positions[:, 1]
+        table["energy"] = float(getattr(control_point, "NominalBeamEnergy", 0.0)) / 1000.0
+        table["weight"] = weights[:spot_count]
+        table["layer"] = idx // 2
+        table["control_point"] = idx
+        tables.append(table)
+
+    return np.concatenate(tables) if tables else np.zeros(0, dtype=SPOT_DTYPE)
 
 
 def load_proton_plan(file_path: Path) -> bool:
@@ -66,50 +126,8 @@ def load_proton_plan(file_path: Path) -> bool:
             show_message_box(f"Beam {beam_index} has no control points.", "Error", "ERROR")
             continue
 
-        num_control_points = len(control_points)
-
-        x_vals: list[float] = []
-        y_vals: list[float] = []
-        energies: list[float] = []
-        spot_weights: list[float] = []
-
-        for idx in range(0, num_control_points, 2):
-            control_point = control_points[idx]
-            positions = _as_float_list(getattr(control_point, "ScanSpotPositionMap", None))
-            weights = _as_float_list(getattr(control_point, "ScanSpotMetersetWeights", None))
-            if not positions or not weights:
-                show_message_box(
-                    f"Beam {beam_index} control point {idx} is missing spot positions or weights.",
-                    "Error",
-                    "ERROR",
-                )
-                continue
-            if len(positions) % 2 != 0:
-                show_message_box(
-                    f"Beam {beam_index} control point {idx} has an odd number of spot positions.",
-                    "Error",
-                    "ERROR",
-                )
-                continue
-
-            spot_count = len(positions) // 2
-            if len(weights) < spot_count:
-                show_message_box(
-                    f"Beam {beam_index} control point {idx} has fewer weights than positions.",
-                    "Error",
-                    "ERROR",
-                )
-                continue
-
-            nominal_energy = float(getattr(control_point, "NominalBeamEnergy", 0.0)) / 1000.0
-            for spot_index in range(spot_count):
-                pos_index = spot_index * 2
-                x_vals.append(positions[pos_index] / 1000.0)
-                y_vals.append(positions[pos_index + 1] / 1000.0)
-                energies.append(nominal_energy)
-                spot_weights.append(weights[spot_index])
-
-        count = len(spot_weights)
+        spots = beam_spot_table(beam_index, control_points)
+        count = len(spots)
         if count == 0:
             show_message_box(
                 f"Beam {beam_index} did not contain any valid scan spot data.",
@@ -121,20 +139,30 @@ def load_proton_plan(file_path: Path) -> bool:
         mesh = bpy.data.meshes.new(name=f"proton_spots_{beam_index}")
         data_fields = ["spot_x", "spot_y", "spot_E", "spot_weight"]
         add_data_fields(mesh, data_fields)
+        for field in ("spot_layer", "spot_control_point"):
+            mesh.attributes.new(name=field, type="INT", domain="POINT")
         mesh.vertices.add(count)
 
-        for row in range(count):
-            mesh.attributes["spot_x"].data[row].value = x_vals[row]
-            mesh.attributes["spot_y"].data[row].value = y_vals[row]
-            mesh.attributes["spot_E"].data[row].value = energies[row]
-            mesh.attributes["spot_weight"].data[row].value = spot_weights[row]
-            mesh.vertices[row].co = (0.01 * row, 0.0, 0.0)
+        # Spots are laid out along x; the geometry nodes place them from the attributes.
+        coords = np.zeros((count, 3), dtype=np.float32)
+        coords[:, 0] = 0.01 * np.arange(count)
+        mesh.vertices.foreach_set("co", coords.ravel())
+        for field, column in (
+            ("spot_x", "x"),
+            ("spot_y", "y"),
+            ("spot_E", "energy"),
+            ("spot_weight", "weight"),
+            ("spot_layer", "layer"),
+            ("spot_control_point", "control_point"),
+        ):
+            mesh.attributes[field].data.foreach_set("value", np.ascontiguousarray(spots[column]))
 
         mesh.update()
         mesh.validate()
 
         if mesh.vertices:
-            obj = create_object(mesh, mesh.name)
+            # Deselect once for the whole plan rather than once per beam.
+            obj = create_object(mesh, mesh.name, deselect_others=imported_beam_count == 0)
             gantry_angle = float(getattr(control_points[0], "GantryAngle", 0.0))
             iso_center_raw = getattr(control_points[0], "IsocenterPosition", (0.0, 0.0, 0.0))
             iso_center = tuple(val / 1000.0 for val in iso_center_raw)
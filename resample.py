@@ -0,0 +1,190 @@
+"""Vectorised resampling helpers for image, dose and mask volumes."""
+
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+def uniform_slice_spacing(offsets: np.ndarray, tolerance: float = 0.01) -> Tuple[float, bool]:
+    """Return the median slice step of ascending ``offsets`` and whether it is uniform.
+
+    A series counts as uniform when every step is within ``tolerance`` (a
+    fraction of the median step) of the median. A step of ``0.0`` is returned
+    when all offsets coincide.
+    """
+
+    deltas = np.diff(np.asarray(offsets, dtype=float))
+    non_zero = np.abs(deltas) > 1e-6
+    if not np.any(non_zero):
+        return 0.0, True
+
+    spacing = float(np.median(np.abs(deltas[non_zero])))
+    uniform = bool(np.all(np.abs(np.abs(deltas) - spacing) <= tolerance * spacing))
+    return spacing, uniform
+
+
+def uniform_offsets(offsets: np.ndarray, spacing: float) -> np.ndarray:
+    """Return a uniform lattice with ``spacing`` covering ascending ``offsets``."""
+
+    offsets = np.asarray(offsets, dtype=float)
+    count = int(np.floor((offsets[-1] - offsets[0]) / spacing + 0.5)) + 1
+    return offsets[0] + np.arange(max(count, 1), dtype=float) * spacing
+
+
+def linear_slice_weights(
+    source_offsets: np.ndarray,
+    target_offsets: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Return ``(lower, upper, weight)`` for linear interpolation along one axis.
+
+    ``source_offsets`` must be ascending. Targets outside the source range are
+    clamped to the nearest source plane.
+    """
+
+    source = np.asarray(source_offsets, dtype=float)
+    target = np.asarray(target_offsets, dtype=float)
+    last = source.size - 1
+
+    index = np.searchsorted(source, target, side="right")
+    lower = np.clip(index - 1, 0, last)
+    upper = np.clip(index, 0, last)
+    span = source[upper] - source[lower]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        weight = np.where(span > 0, (target - source[lower]) / span, 0.0)
+    return lower, upper, np.clip(weight, 0.0, 1.0)
+
+
+def resample_slices(
+    volume: np.ndarray,
+    lower: np.ndarray,
+    upper: np.ndarray,
+    weight: np.ndarray,
+    out: Optional[np.ndarray] = None,
+    chunk_size: int = 16,
+) -> np.ndarray:
+    """Blend planes of ``volume`` along axis 0 using :func:`linear_slice_weights` output.
+
+    Output planes are written ``chunk_size`` at a time so temporaries stay
+    small regardless of volume size.
+    """
+
+    if out is None:
+        out = np.empty((len(weight),) + volume.shape[1:], dtype=volume.dtype)
+
+    for start in range(0, len(weight), chunk_size):
+        stop = min(start + chunk_size, len(weight))
+        block_weight = weight[start:stop, np.newaxis, np.newaxis].astype(out.dtype)
+        block = out[start:stop]
+        np.multiply(volume[lower[start:stop]], 1.0 - block_weight, out=block)
+        block += volume[upper[start:stop]] * block_weight
+
+    return out
+
+
+def downsample_blocks(array: np.ndarray, reduce: str = "mean") -> np.ndarray:
+    """Halve every axis of a 3D array by 2x2x2 block ``"mean"`` or ``"max"``.
+
+    Odd axes are padded by repeating the last plane. Means are returned as
+    float32; maxima keep the input dtype.
+    """
+
+    padding = [(0, dim % 2) for dim in array.shape]
+    if any(after for _before, after in padding):
+        array = np.pad(array, padding, mode="edge")
+
+    half = tuple(dim // 2 for dim in array.shape)
+    blocks = array.reshape(half[0], 2, half[1], 2, half[2], 2)
+    if reduce == "max":
+        return blocks.max(axis=(1, 3, 5))
+    return blocks.mean(axis=(1, 3, 5), dtype=np.float32)
+
+
+def trilinear_resample(
+    source: np.ndarray,
+    source_origin: np.ndarray,
+    source_basis: np.ndarray,
+    target_shape: Tuple[int, int, int],
+    target_origin: np.ndarray,
+    target_basis: np.ndarray,
+    out: Optional[np.ndarray] = None,
+    accumulate: bool = False,
+    fill_value: float = 0.0,
+    chunk_planes: int = 4,
+    max_workers: Optional[int] = None,
+) -> np.ndarray:
+    """Sample ``source`` at every voxel of a target grid with trilinear interpolation.
+
+    Grids are described by the patient-space position of voxel ``(0, 0, 0)``
+    and a 3x3 basis whose columns are the index steps in mm. Target planes
+    are computed ``chunk_planes`` at a time, on ``max_workers`` threads when
+    given (chunks write disjoint planes of ``out``); with ``accumulate`` the
+    samples are added to ``out`` instead of replacing it. Target voxels
+    outside the source grid receive ``fill_value``.
+    """
+
+    target_shape = tuple(int(value) for value in target_shape)
+    if out is None:
+        out = np.zeros(target_shape, dtype=np.float32)
+
+    # Target index -> source index is affine: to_source @ ijk + offset.
+    inv_source = np.linalg.inv(np.asarray(source_basis, dtype=float))
+    to_source = inv_source @ np.asarray(target_basis, dtype=float)
+    offset = inv_source @ (np.asarray(target_origin, dtype=float) - np.asarray(source_origin, dtype=float))
+
+    rows, cols = np.meshgrid(np.arange(target_shape[1]), np.arange(target_shape[2]), indexing="ij")
+    plane_coords = (
+        rows.reshape(-1, 1) * to_source[:, 1] + cols.reshape(-1, 1) * to_source[:, 2] + offset
+    ).astype(np.float32)
+    del rows, cols
+
+    source_shape = np.asarray(source.shape)
+    upper_limit = (source_shape - 1).astype(np.float32)
+    strides = np.asarray([source.shape[1] * source.shape[2], source.shape[2], 1], dtype=np.int64)
+    # Axes a single plane thick have no upper neighbour to blend with.
+    slice_stride, row_stride, col_stride = np.where(source_shape > 1, strides, 0)
+    flat_source = source.reshape(-1)
+    slice_step = to_source[:, 0].astype(np.float32)
+
+    def fill_chunk(first_plane: int) -> None:
+        planes = np.arange(first_plane, min(first_plane + chunk_planes, target_shape[0]), dtype=np.float32)
+        coords = plane_coords[np.newaxis] + planes[:, np.newaxis, np.newaxis] * slice_step
+        coords = coords.reshape(-1, 3)
+
+        inside = np.all((coords >= -1e-3) & (coords <= upper_limit + 1e-3), axis=1)
+        coords = np.clip(coords, 0.0, upper_limit)
+        lower = np.minimum(coords.astype(np.int64), np.maximum(source_shape - 2, 0))
+        fraction = coords - lower.astype(np.float32)
+        base = lower[:, 0] * strides[0] + lower[:, 1] * strides[1] + lower[:, 2]
+        del coords, lower
+
+        # Blend the 8 corners along columns, then rows, then slices.
+        def blend_cols(offset: int) -> np.ndarray:
+            first = flat_source[base + offset]
+            return first + fraction[:, 2] * (flat_source[base + offset + col_stride] - first)
+
+        near = blend_cols(0)
+        near += fraction[:, 1] * (blend_cols(row_stride) - near)
+        far = blend_cols(slice_stride)
+        far += fraction[:, 1] * (blend_cols(slice_stride + row_stride) - far)
+        values = near + fraction[:, 0] * (far - near)
+        values[~inside] = fill_value
+
+        block = out[first_plane : first_plane + len(planes)]
+        values = values.reshape(block.shape)
+        if accumulate:
+            block += values
+        else:
+            block[...] = values
+
+    chunk_starts = range(0, target_shape[0], chunk_planes)
+    if max_workers and max_workers > 1:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            list(executor.map(fill_chunk, chunk_starts))
+    else:
+        for first_plane in chunk_starts:
+            fill_chunk(first_plane)
+
+    return out
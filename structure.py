@@ -2,16 +2,30 @@
 
 from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+import re
+from typing import Iterable, Optional
 
 import bpy
 import numpy as np
 import pydicom
 
-from .dicom_util import check_dicom_image_type, is_structure_file
+from .blender_utils import create_mesh
+from .dicom_index import index_directory
+from .dicom_util import check_dicom_image_type, default_worker_count, is_structure_file, sort_by_slice_position
+from .dose import find_ct_anchor
 from .node_groups import apply_dicom_shader
+from .resample import uniform_offsets, uniform_slice_spacing
+from .surface import decimate_mesh, extract_isosurface, smooth_mesh
 from .ui_utils import show_message_box
-from .volume_utils import align_object_to_ct_frame, set_object_patient_transform, write_vdb_volume
+from .volume_utils import (
+    align_object_to_ct_frame,
+    resolve_dicom_index_path,
+    set_object_patient_transform,
+    write_vdb_grids,
+    write_vdb_volume,
+)
 
 
 def _load_reference_image_slices(directory_path: Path, dicom_structure: pydicom.Dataset) -> list[pydicom.Dataset]:
@@ -38,13 +52,7 @@ def _load_reference_image_slices(directory_path: Path, dicom_structure: pydicom.
         pass
 
     image_slices: list[pydicom.Dataset] = []
-    for file_path in directory_path.iterdir():
-        if not file_path.is_file():
-            continue
-        try:
-            ds = pydicom.dcmread(file_path, stop_before_pixels=True)
-        except Exception:
-            continue
+    for ds in index_directory(directory_path, resolve_dicom_index_path()):
         if not check_dicom_image_type(ds):
             continue
         if referenced_series_uid and getattr(ds, "SeriesInstanceUID", None) != referenced_series_uid:
@@ -78,10 +86,9 @@ def _build_geometry(image_slices: list[pydicom.Dataset]):
     normal_dir = normal_dir / normal_norm
 
     # Sort slices along the slice normal direction.
-    projections = [float(np.dot(np.asarray(ds.ImagePositionPatient, dtype=float), normal_dir)) for ds in image_slices]
-    sorted_pairs = sorted(zip(projections, image_slices), key=lambda pair: pair[0])
-    sorted_projections = [pair[0] for pair in sorted_pairs]
-    sorted_slices = [pair[1] for pair in sorted_pairs]
+    sorted_slices, sorted_projections = sort_by_slice_position(image_slices)
+    if sorted_projections is None:
+        raise ValueError("Referenced images are missing ImagePositionPatient.")
 
     pixel_spacing = getattr(sorted_slices[0], "PixelSpacing", [1.0, 1.0])
     if len(pixel_spacing) < 2:
@@ -91,17 +98,13 @@ def _build_geometry(image_slices: list[pydicom.Dataset]):
     if row_spacing <= 0 or col_spacing <= 0:
         raise ValueError("Referenced images have invalid PixelSpacing.")
 
-    if len(sorted_projections) > 1:
-        deltas = np.diff(np.asarray(sorted_projections))
-        non_zero = np.abs(deltas) > 1e-6
-        if np.any(non_zero):
-            slice_spacing = float(np.median(np.abs(deltas[non_zero])))
-        else:
-            slice_spacing = float(getattr(sorted_slices[0], "SliceThickness", 1.0))
-    else:
+    slice_spacing, _uniform = uniform_slice_spacing(sorted_projections)
+    if slice_spacing <= 0:
         slice_spacing = float(getattr(sorted_slices[0], "SliceThickness", 1.0))
     if slice_spacing <= 0:
         slice_spacing = 1.0
+    # Match the uniform lattice the CT importer resamples irregular series onto.
+    num_slices = len(uniform_offsets(sorted_projections, slice_spacing))
 
     origin = np.asarray(sorted_slices[0].ImagePositionPatient, dtype=float)
     rows = int(getattr(sorted_slices[0], "Rows", 0))
@@ -122,7 +125,7 @@ def _build_geometry(image_slices: list[pydicom.Dataset]):
         "basis": basis,
         "rows": rows,
         "cols": cols,
-        "num_slices": len(sorted_slices),
+        "num_slices": num_slices,
         "spacing": (slice_spacing, row_spacing, col_spacing),
         "vdb_basis": np.column_stack((slice_axis, row_axis, col_axis)),
         "slice_axis_dir": slice_axis / np.linalg.norm(slice_axis),
@@ -131,6 +134,38 @@ def _build_geometry(image_slices: list[pydicom.Dataset]):
     }
 
 
+def _build_geometry_from_ct(ct_anchor):
+    """Return the rasterisation grid of an imported CT from its stored frame metadata.
+
+    Masks built on this grid share the CT's voxel lattice, including its
+    flipped slice axis, so no image files need to be read.
+    """
+
+    shape = ct_anchor.get("medblend_ct_shape")
+    basis_flat = ct_anchor.get("medblend_ct_basis_mm")
+    if not shape or len(shape) != 3 or not basis_flat or len(basis_flat) != 9:
+        return None
+
+    vdb_basis = np.asarray(basis_flat, dtype=float).reshape((3, 3))
+    slice_axis, row_axis, col_axis = vdb_basis.T
+    # Basis for [row_index, col_index, slice_index] coordinates.
+    basis = np.column_stack((row_axis, col_axis, slice_axis))
+    num_slices, rows, cols = (int(value) for value in shape)
+    return {
+        "origin": np.asarray(ct_anchor.get("medblend_ct_origin_mm", [0.0, 0.0, 0.0]), dtype=float),
+        "inv_basis": np.linalg.inv(basis),
+        "basis": basis,
+        "rows": rows,
+        "cols": cols,
+        "num_slices": num_slices,
+        "spacing": tuple(float(value) for value in ct_anchor.get("medblend_ct_spacing_mm", [1.0, 1.0, 1.0])),
+        "vdb_basis": vdb_basis,
+        "slice_axis_dir": slice_axis / np.linalg.norm(slice_axis),
+        "row_axis_dir": row_axis / np.linalg.norm(row_axis),
+        "col_axis_dir": col_axis / np.linalg.norm(col_axis),
+    }
+
+
 def _iter_contour_points(dicom_structure: pydicom.Dataset):
     for roi_contour in getattr(dicom_structure, "ROIContourSequence", []):
         for contour in getattr(roi_contour, "ContourSequence", []):
@@ -259,7 +294,7 @@ def _build_geometry_from_contours(dicom_structure: pydicom.Dataset):
     }
 
 
-def _get_structure_frame_uid(dicom_structure: pydicom.Dataset) -> str:
+def get_structure_frame_uid(dicom_structure: pydicom.Dataset) -> str:
     frame_uid = str(getattr(dicom_structure, "FrameOfReferenceUID", ""))
     if frame_uid:
         return frame_uid
@@ -272,51 +307,85 @@ def _get_structure_frame_uid(dicom_structure: pydicom.Dataset) -> str:
     return ""
 
 
-def _find_ct_anchor(frame_uid: str):
-    ct_candidates = [obj for obj in bpy.data.objects if bool(obj.get("medblend_is_ct"))]
-    if frame_uid:
-        ct_candidates = [obj for obj in ct_candidates if obj.get("medblend_frame_of_reference_uid", "") == frame_uid]
-    if not ct_candidates:
-        return None
-    return ct_candidates[-1]
+def resolve_structure_geometry(dicom_structure: pydicom.Dataset, directory_path: Path, ct_anchor=None):
+    """Return the rasterisation grid: the imported CT's, else the referenced images', else the contours' extent.
+
+    The CT grid is used only when the CT shares the structure set's (non-empty)
+    frame of reference; contours outside an unrelated grid would be dropped.
+    """
+
+    # An imported CT already carries the grid; only read images without one.
+    frame_uid = get_structure_frame_uid(dicom_structure)
+    same_frame = bool(frame_uid) and ct_anchor and ct_anchor.get("medblend_frame_of_reference_uid", "") == frame_uid
+    geometry = _build_geometry_from_ct(ct_anchor) if same_frame else None
+    if geometry is None:
+        image_slices = _load_reference_image_slices(directory_path, dicom_structure)
+        if image_slices:
+            geometry = _build_geometry(image_slices)
+        else:
+            geometry = _build_geometry_from_contours(dicom_structure)
+    return geometry
 
 
 def _polygon_mask(shape: tuple[int, int], polygon_rc: np.ndarray) -> np.ndarray:
-    rows, cols = shape
-    if polygon_rc.shape[0] < 3:
-        return np.zeros(shape, dtype=bool)
-
-    poly_r = polygon_rc[:, 0]
-    poly_c = polygon_rc[:, 1]
-
-    min_r = max(int(np.floor(np.min(poly_r))), 0)
-    max_r = min(int(np.ceil(np.max(poly_r))), rows - 1)
-    min_c = max(int(np.floor(np.min(poly_c))), 0)
-    max_c = min(int(np.ceil(np.max(poly_c))), cols - 1)
-    if min_r > max_r or min_c > max_c:
-        return np.zeros(shape, dtype=bool)
-
-    rr, cc = np.mgrid[min_r : max_r + 1, min_c : max_c + 1]
-    y = rr + 0.5
-    x = cc + 0.5
-
-    inside = np.zeros_like(y, dtype=bool)
-    y1 = poly_r
-    x1 = poly_c
-    y2 = np.roll(poly_r, -1)
-    x2 = np.roll(poly_c, -1)
-
-    for edge_index in range(len(poly_r)):
-        yi, yj = y1[edge_index], y2[edge_index]
-        xi, xj = x1[edge_index], x2[edge_index]
-        if yi == yj:
-            continue
-        intersects = ((yi > y) != (yj > y))
-        x_intersection = (xj - xi) * (y - yi) / (yj - yi) + xi
-        inside ^= intersects & (x < x_intersection)
+    """Rasterise a closed polygon with the even-odd rule, sampling pixel centres.
+
+    Edge crossings of every pixel-centre row are computed at once from an
+    edge table, sorted per row, and consecutive crossing pairs become column
+    spans filled through a cumulative sum, without a per-span Python loop.
+    """
 
+    rows, cols = shape
     mask = np.zeros(shape, dtype=bool)
-    mask[min_r : max_r + 1, min_c : max_c + 1] = inside
+    if polygon_rc.shape[0] < 3:
+        return mask
+
+    y1 = polygon_rc[:, 0]
+    x1 = polygon_rc[:, 1]
+    y2 = np.roll(y1, -1)
+    x2 = np.roll(x1, -1)
+
+    # An edge crosses pixel-centre row r (y = r + 0.5) when min(y) <= y < max(y).
+    low = np.minimum(y1, y2)
+    high = np.maximum(y1, y2)
+    first_row = np.clip(np.ceil(low - 0.5), 0, rows).astype(np.int64)
+    stop_row = np.clip(np.ceil(high - 0.5), 0, rows).astype(np.int64)
+    counts = np.maximum(stop_row - first_row, 0)
+    total = int(counts.sum())
+    if total == 0:
+        return mask
+
+    edge_index = np.repeat(np.arange(len(counts)), counts)
+    row_in_edge = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    crossing_row = first_row[edge_index] + row_in_edge
+
+    yi, yj = y1[edge_index], y2[edge_index]
+    xi, xj = x1[edge_index], x2[edge_index]
+    crossing_x = (xj - xi) * (crossing_row + 0.5 - yi) / (yj - yi) + xi
+
+    order = np.lexsort((crossing_x, crossing_row))
+    crossing_row = crossing_row[order]
+    crossing_x = crossing_x[order]
+
+    # Every row has an even number of crossings; pixel c is inside when
+    # x[2k] <= c + 0.5 < x[2k + 1].
+    span_rows = crossing_row[0::2]
+    span_starts = np.clip(np.ceil(crossing_x[0::2] - 0.5), 0, cols).astype(np.int64)
+    span_stops = np.clip(np.ceil(crossing_x[1::2] - 0.5), 0, cols).astype(np.int64)
+    filled = span_starts < span_stops
+    if not np.any(filled):
+        return mask
+    span_rows = span_rows[filled]
+    first = int(span_rows[0])
+    band_rows = int(span_rows[-1]) - first + 1
+    span_rows = (span_rows - first) * (cols + 1)
+    # Non-empty spans in a row are disjoint, so +1 at each start and -1 at each
+    # stop of a row-difference array sum to 1 exactly inside them.
+    edges = np.zeros(band_rows * (cols + 1), dtype=np.int8)
+    edges[span_rows + span_starts[filled]] += 1
+    edges[span_rows + span_stops[filled]] -= 1
+    coverage = np.cumsum(edges.reshape(band_rows, cols + 1), axis=1, dtype=np.int8)
+    mask[first : first + band_rows] = coverage[:, :cols] > 0
     return mask
 
 
@@ -325,53 +394,223 @@ def _contour_points_to_ijk(points_xyz: np.ndarray, origin: np.ndarray, inv_basis
     return (inv_basis @ diffs.T).T
 
 
-def _rtstruct_to_masks(dicom_structure: pydicom.Dataset, geometry) -> tuple[list[np.ndarray], list[str]]:
+def _rasterise_roi(roi_contour, geometry, margin: int, alignment: int):
+    """Return ``(mask, first_voxel_index)`` for one ROI contour set, or ``None`` if it is empty."""
+
+    frame_shape = np.asarray((geometry["num_slices"], geometry["rows"], geometry["cols"]))
+    origin = geometry["origin"]
+    inv_basis = geometry["inv_basis"]
+
+    contours = []
+    for contour in getattr(roi_contour, "ContourSequence", []):
+        contour_data = getattr(contour, "ContourData", None)
+        if not contour_data or len(contour_data) < 9:
+            continue
+
+        points_xyz = np.asarray(contour_data, dtype=float).reshape((-1, 3))
+        ijk = _contour_points_to_ijk(points_xyz, origin, inv_basis)
+
+        slice_index = int(np.rint(np.mean(ijk[:, 2])))
+        if slice_index < 0 or slice_index >= frame_shape[0]:
+            continue
+        contours.append((slice_index, ijk[:, :2]))
+
+    if not contours:
+        return None
+
+    slice_indices = np.asarray([slice_index for slice_index, _polygon_rc in contours])
+    points_rc = np.concatenate([polygon_rc for _slice_index, polygon_rc in contours])
+    lower = np.asarray(
+        (slice_indices.min(), np.floor(points_rc[:, 0].min()), np.floor(points_rc[:, 1].min())), dtype=int
+    )
+    upper = np.asarray(
+        (slice_indices.max() + 1, np.ceil(points_rc[:, 0].max()) + 1, np.ceil(points_rc[:, 1].max()) + 1),
+        dtype=int,
+    )
+    lower = np.maximum(lower - margin, 0) // alignment * alignment
+    upper = np.minimum(upper + margin, frame_shape)
+    if np.any(upper <= lower):
+        return None
+
+    roi_shape = tuple(int(value) for value in upper - lower)
+    volume_mask = np.zeros(roi_shape, dtype=bool)
+    for slice_index, polygon_rc in contours:
+        polygon_mask = _polygon_mask(roi_shape[1:], polygon_rc - lower[1:])
+        # XOR composition matches typical RTSTRUCT contour hole semantics.
+        volume_mask[slice_index - lower[0]] ^= polygon_mask
+
+    if not np.any(volume_mask):
+        return None
+    return volume_mask, tuple(int(value) for value in lower)
+
+
+def structure_roi_names(dicom_structure: pydicom.Dataset) -> dict[int, str]:
+    """Return the ROI name of every ``ROINumber`` in the structure set."""
+
     roi_names = {}
     for roi in getattr(dicom_structure, "StructureSetROISequence", []):
         roi_number = int(getattr(roi, "ROINumber", -1))
-        roi_name = str(getattr(roi, "ROIName", f"ROI_{roi_number}"))
-        roi_names[roi_number] = roi_name
+        roi_names[roi_number] = str(getattr(roi, "ROIName", f"ROI_{roi_number}"))
+    return roi_names
+
+
+def rasterise_rois(
+    dicom_structure: pydicom.Dataset,
+    geometry,
+    margin: int = 1,
+    alignment: int = 1,
+    max_workers: Optional[int] = None,
+    roi_numbers: Optional[Iterable[int]] = None,
+) -> dict[int, Optional[tuple[np.ndarray, tuple[int, int, int]]]]:
+    """Return ``{roi_number: (mask, first_voxel_index)}`` in structure-set order.
+
+    ROIs without contours inside the frame map to ``None``. See
+    :func:`rtstruct_to_masks` for the mask layout and options.
+    """
+
+    roi_contours = list(getattr(dicom_structure, "ROIContourSequence", []))
+    if roi_numbers is not None:
+        wanted = {int(roi_number) for roi_number in roi_numbers}
+        roi_contours = [
+            roi_contour
+            for roi_contour in roi_contours
+            if int(getattr(roi_contour, "ReferencedROINumber", -1)) in wanted
+        ]
+    if not roi_contours:
+        return {}
+    workers = max(1, min(max_workers or default_worker_count(), len(roi_contours)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(
+            executor.map(lambda roi_contour: _rasterise_roi(roi_contour, geometry, margin, alignment), roi_contours)
+        )
+    return {
+        int(getattr(roi_contour, "ReferencedROINumber", -1)): result
+        for roi_contour, result in zip(roi_contours, results)
+    }
 
-    rows = geometry["rows"]
-    cols = geometry["cols"]
-    num_slices = geometry["num_slices"]
-    origin = geometry["origin"]
-    inv_basis = geometry["inv_basis"]
+
+def rtstruct_to_masks(
+    dicom_structure: pydicom.Dataset,
+    geometry,
+    margin: int = 1,
+    alignment: int = 1,
+    max_workers: Optional[int] = None,
+    roi_numbers: Optional[Iterable[int]] = None,
+) -> tuple[list[np.ndarray], list[tuple[int, int, int]], list[str]]:
+    """Rasterise each ROI into a boolean mask cropped to its own bounding box.
+
+    Masks are indexed ``[slice, row, col]`` and returned with the index of
+    their first voxel in the full image frame. The box is padded by
+    ``margin`` voxels and its start rounded down to a multiple of
+    ``alignment`` (needed for LOD levels). ROIs are rasterised concurrently
+    on ``max_workers`` threads (default :func:`default_worker_count`).
+    With ``roi_numbers`` only those ROIs are rasterised.
+    """
+
+    roi_names = structure_roi_names(dicom_structure)
+    results = rasterise_rois(dicom_structure, geometry, margin, alignment, max_workers, roi_numbers)
 
     struct_masks: list[np.ndarray] = []
+    struct_offsets: list[tuple[int, int, int]] = []
     struct_names: list[str] = []
+    for roi_number, result in results.items():
+        if result is None:
+            continue
+        volume_mask, offset = result
+        struct_masks.append(volume_mask)
+        struct_offsets.append(offset)
+        struct_names.append(roi_names.get(roi_number, f"ROI_{roi_number}"))
 
-    for roi_contour in getattr(dicom_structure, "ROIContourSequence", []):
-        roi_number = int(getattr(roi_contour, "ReferencedROINumber", -1))
-        roi_name = roi_names.get(roi_number, f"ROI_{roi_number}")
-        volume_mask = np.zeros((num_slices, rows, cols), dtype=bool)
+    return struct_masks, struct_offsets, struct_names
 
-        for contour in getattr(roi_contour, "ContourSequence", []):
-            contour_data = getattr(contour, "ContourData", None)
-            if not contour_data or len(contour_data) < 9:
-                continue
 
-            points_xyz = np.asarray(contour_data, dtype=float).reshape((-1, 3))
-            ijk = _contour_points_to_ijk(points_xyz, origin, inv_basis)
+def list_structure_rois(file_path: Path) -> list[dict]:
+    """Summarise every ROI of an RT Structure Set without rasterising anything.
 
-            slice_index = int(np.rint(np.mean(ijk[:, 2])))
-            if slice_index < 0 or slice_index >= num_slices:
-                continue
+    Returns dicts with ``number``, ``name``, ``type`` (RTROIInterpretedType),
+    ``contours`` and ``points``. Large values such as ContourData are
+    deferred by pydicom and never parsed.
+    """
 
-            polygon_rc = ijk[:, :2]
-            polygon_mask = _polygon_mask((rows, cols), polygon_rc)
+    dicom_structure = pydicom.dcmread(file_path, defer_size="1 KB")
+    if not is_structure_file(dicom_structure):
+        raise ValueError("Selected file is not an RT Structure Set.")
 
-            # XOR composition matches typical RTSTRUCT contour hole semantics.
-            volume_mask[slice_index] ^= polygon_mask
+    roi_types = {
+        int(getattr(observation, "ReferencedROINumber", -1)): str(getattr(observation, "RTROIInterpretedType", ""))
+        for observation in getattr(dicom_structure, "RTROIObservationsSequence", [])
+    }
+    contour_counts = {}
+    for roi_contour in getattr(dicom_structure, "ROIContourSequence", []):
+        contours = getattr(roi_contour, "ContourSequence", [])
+        points = sum(int(getattr(contour, "NumberOfContourPoints", 0) or 0) for contour in contours)
+        contour_counts[int(getattr(roi_contour, "ReferencedROINumber", -1))] = (len(contours), points)
+
+    rois = []
+    for roi in getattr(dicom_structure, "StructureSetROISequence", []):
+        roi_number = int(getattr(roi, "ROINumber", -1))
+        contours, points = contour_counts.get(roi_number, (0, 0))
+        rois.append(
+            {
+                "number": roi_number,
+                "name": str(getattr(roi, "ROIName", f"ROI_{roi_number}")),
+                "type": roi_types.get(roi_number, ""),
+                "contours": contours,
+                "points": points,
+            }
+        )
+    return rois
 
-        if np.any(volume_mask):
-            struct_masks.append(volume_mask.astype(float))
-            struct_names.append(roi_name)
 
-    return struct_masks, struct_names
+def roi_name_matches(name: str, pattern: str, use_regex: bool = False) -> bool:
+    """Match ``name`` against comma-separated substrings, or a regular expression (both case-insensitive)."""
 
+    if use_regex:
+        try:
+            return re.search(pattern, name, re.IGNORECASE) is not None
+        except re.error:
+            return False
+    terms = [term.strip().lower() for term in pattern.split(",") if term.strip()]
+    return any(term in name.lower() for term in terms)
+
+
+def _unique_grid_names(names: list[str], reserved: set[str]) -> list[str]:
+    """Return ``names`` made unique (VDB grid names must be) by numbering repeats."""
+
+    used = set(reserved)
+    unique = []
+    for name in names:
+        candidate = name
+        suffix = 1
+        while candidate in used:
+            suffix += 1
+            candidate = f"{name}.{suffix:03d}"
+        used.add(candidate)
+        unique.append(candidate)
+    return unique
+
+
+def load_structures(
+    file_path: Path,
+    lod_levels: int = 0,
+    single_object: bool = False,
+    output_mode: str = "VOLUME",
+    smoothing_iterations: int = 10,
+    decimate_voxels: float = 0.0,
+    roi_numbers: Optional[Iterable[int]] = None,
+) -> bool:
+    """Import the ROIs of an RT Structure Set as sparse mask volumes or surface meshes.
+
+    ROIs are placed in one new collection named after the structure set. With
+    ``single_object`` every ROI becomes a named grid of a single VDB file and
+    volume object instead of one file and object per ROI. ``output_mode``
+    ``"MESH"`` instead converts each mask to a triangle surface, Taubin
+    smoothed for ``smoothing_iterations`` and, with ``decimate_voxels``,
+    simplified by merging vertices within cells of that many voxels.
+    ``roi_numbers`` restricts the import to those ROIs (see
+    :func:`list_structure_rois`); other ROIs are never rasterised.
+    """
 
-def load_structures(file_path: Path) -> bool:
     structure_file_path = Path(file_path)
     directory_path = structure_file_path.parent
 
@@ -385,13 +624,13 @@ def load_structures(file_path: Path) -> bool:
         show_message_box("Selected file is not an RT Structure Set.", "Error", "ERROR")
         return False
 
+    frame_uid = get_structure_frame_uid(dicom_structure)
+    ct_anchor = find_ct_anchor(frame_uid)
     try:
-        image_slices = _load_reference_image_slices(directory_path, dicom_structure)
-        if image_slices:
-            geometry = _build_geometry(image_slices)
-        else:
-            geometry = _build_geometry_from_contours(dicom_structure)
-        struct_masks, struct_names = _rtstruct_to_masks(dicom_structure, geometry)
+        geometry = resolve_structure_geometry(dicom_structure, directory_path, ct_anchor)
+        struct_masks, struct_offsets, struct_names = rtstruct_to_masks(
+            dicom_structure, geometry, alignment=1 << max(0, int(lod_levels)), roi_numbers=roi_numbers
+        )
     except Exception as exc:
         show_message_box(
             f"Unable to convert RT Structure contours: {exc}",
@@ -405,30 +644,88 @@ def load_structures(file_path: Path) -> bool:
         return False
 
     spacing = geometry["spacing"]
-    frame_uid = _get_structure_frame_uid(dicom_structure)
-    ct_anchor = _find_ct_anchor(frame_uid)
-    for mask, name in zip(struct_masks, struct_names):
-        result = write_vdb_volume(mask.astype(float), spacing, f"{name}.vdb")
-        if not result:
-            return False
-        _output_path, imported_obj = result
+    label = str(getattr(dicom_structure, "StructureSetLabel", "") or structure_file_path.stem)
+
+    # Objects are collected off-scene and the collection is linked once, so the
+    # view layer is rebuilt a single time however many ROIs there are.
+    collection = bpy.data.collections.new(label)
+    write_options = {"lod_levels": lod_levels, "lod_reduce": "max", "background": 0.0, "collection": collection}
+    # (object, patient-space origin of its index (0, 0, 0)) pairs.
+    imported_objects = []
+    success = True
+    if output_mode == "MESH":
+        scale = np.asarray(spacing, dtype=float) / 1000.0
+        for mask, offset, name in zip(struct_masks, struct_offsets, struct_names):
+            # One voxel of padding closes surfaces that touch the crop box.
+            vertices, faces = extract_isosurface(np.pad(mask, 1), 0.5)
+            if len(faces) == 0:
+                continue
+            vertices = smooth_mesh(vertices - 1.0, faces, smoothing_iterations)
+            if decimate_voxels > 0:
+                vertices, faces = decimate_mesh(vertices, faces, decimate_voxels)
+            mesh_obj = bpy.data.objects.new(name, create_mesh(name, vertices * scale, faces))
+            collection.objects.link(mesh_obj)
+            roi_origin = geometry["origin"] + geometry["vdb_basis"] @ np.asarray(offset, dtype=float)
+            imported_objects.append((mesh_obj, roi_origin))
+    elif single_object:
+        # Cropped ROI grids keep their place in the frame through ijk offsets.
+        union_lower = np.min(struct_offsets, axis=0)
+        union_upper = np.max([np.add(offset, mask.shape) for mask, offset in zip(struct_masks, struct_offsets)], axis=0)
+        union_mask = np.zeros(tuple(union_upper - union_lower), dtype=bool)
+        for mask, offset in zip(struct_masks, struct_offsets):
+            start = np.subtract(offset, union_lower)
+            union_mask[tuple(slice(begin, begin + size) for begin, size in zip(start, mask.shape))] |= mask
+
+        # "density" holds the union for the shared material; ROIs follow as named grids.
+        grid_names = _unique_grid_names(struct_names, reserved={"density"})
+        named_slabs = [("density", ((tuple(int(value) for value in union_lower), union_mask),))]
+        named_slabs += [
+            (grid_name, ((offset, mask),)) for grid_name, mask, offset in zip(grid_names, struct_masks, struct_offsets)
+        ]
+        result = write_vdb_grids(named_slabs, spacing, f"{label}.vdb", **write_options)
+        if result:
+            _output_path, imported_obj = result
+            imported_obj["medblend_roi_names"] = grid_names
+            imported_objects.append((imported_obj, geometry["origin"]))
+        else:
+            success = False
+    else:
+        for mask, offset, name in zip(struct_masks, struct_offsets, struct_names):
+            # Masks are written sparse: only voxels inside the ROI become active.
+            result = write_vdb_volume(mask, spacing, f"{name}.vdb", **write_options)
+            if not result:
+                success = False
+                break
+            # Each cropped grid starts at its own corner of the image frame.
+            roi_origin = geometry["origin"] + geometry["vdb_basis"] @ np.asarray(offset, dtype=float)
+            imported_objects.append((result[1], roi_origin))
+
+    for imported_obj, object_origin in imported_objects:
         aligned = False
         if ct_anchor:
             aligned = align_object_to_ct_frame(
                 imported_obj,
                 ct_anchor,
-                geometry["origin"],
+                object_origin,
                 geometry["vdb_basis"],
                 spacing,
             )
         if not aligned:
             set_object_patient_transform(
                 imported_obj,
-                geometry["origin"],
+                object_origin,
                 geometry["slice_axis_dir"],
                 geometry["row_axis_dir"],
                 geometry["col_axis_dir"],
             )
-        apply_dicom_shader("Structure Material")
+        if output_mode != "MESH":
+            apply_dicom_shader("Structure Material", imported_obj)
+
+    if imported_objects:
+        bpy.context.scene.collection.children.link(collection)
+        bpy.context.view_layer.update()
+        bpy.context.view_layer.objects.active = imported_objects[-1][0]
+    else:
+        bpy.data.collections.remove(collection)
 
-    return True
+    return success
@@ -0,0 +1,218 @@
+"""Vectorised isosurface extraction and mesh clean-up for masks and dose grids."""
+
+from __future__ import annotations
+
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+
+# Cube corner ``c`` sits at offset (c & 1, (c >> 1) & 1, (c >> 2) & 1).
+_CUBE_CORNERS = np.asarray([[(c >> axis) & 1 for axis in range(3)] for c in range(8)], dtype=np.int64)
+
+# Six tetrahedra sharing the 0-7 diagonal. Neighbouring cubes split their
+# shared faces along the same diagonals, so the surface stays watertight.
+_CUBE_TETRAHEDRA = np.asarray(
+    [(0, 1, 3, 7), (0, 3, 2, 7), (0, 2, 6, 7), (0, 6, 4, 7), (0, 4, 5, 7), (0, 5, 1, 7)],
+    dtype=np.int64,
+)
+
+
+def _tetrahedron_edge_table() -> Tuple[np.ndarray, np.ndarray]:
+    """Return ``(edges, counts)``: per inside-corner bitmask, up to two triangles of tet edges."""
+
+    edges = np.zeros((16, 2, 3, 2), dtype=np.int64)
+    counts = np.zeros(16, dtype=np.int64)
+    for case in range(16):
+        inside = [corner for corner in range(4) if case >> corner & 1]
+        outside = [corner for corner in range(4) if not case >> corner & 1]
+        if len(inside) in (1, 3):
+            lone, others = (inside[0], outside) if len(inside) == 1 else (outside[0], inside)
+            edges[case, 0] = [(lone, other) for other in others]
+            counts[case] = 1
+        elif len(inside) == 2:
+            (a, b), (c, d) = inside, outside
+            # Quad a-c, a-d, b-d, b-c split into two triangles.
+            edges[case, 0] = [(a, c), (a, d), (b, d)]
+            edges[case, 1] = [(a, c), (b, d), (b, c)]
+            counts[case] = 2
+    return edges, counts
+
+
+_TET_EDGES, _TET_TRIANGLE_COUNTS = _tetrahedron_edge_table()
+
+
+def extract_isosurface(volume: np.ndarray, level: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Return ``(vertices, faces)`` of the surface where ``volume`` crosses ``level``.
+
+    Marching cubes with each cube split into six tetrahedra, evaluated for
+    all boundary cubes at once. Vertices are in index coordinates of
+    ``volume`` and shared between adjacent triangles; faces are wound so
+    normals point from values above ``level`` to values below it.
+    """
+
+    return extract_isosurfaces(volume, [level])[0]
+
+
+def extract_isosurfaces(volume: np.ndarray, levels: Sequence[float]) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """Return one :func:`extract_isosurface` result per entry of ``levels``, sharing a single sweep.
+
+    Voxels are banded once by how many levels they exceed, so one pass over
+    the cube corners finds the cubes crossed by any level; each level then
+    only triangulates its own subset of those cubes.
+    """
+
+    volume = np.asarray(volume)
+    levels = np.asarray(levels, dtype=float).reshape(-1)
+    empty = (np.zeros((0, 3), dtype=float), np.zeros((0, 3), dtype=np.int64))
+    surfaces = [empty] * len(levels)
+    if volume.ndim != 3 or min(volume.shape) < 2 or len(levels) == 0:
+        return surfaces
+
+    order = np.argsort(levels)
+    # A voxel in band ``b`` lies above exactly ``b`` of the sorted levels.
+    band_dtype = np.uint8 if len(levels) < 256 else np.int32
+    band = np.searchsorted(levels[order], volume, side="left").astype(band_dtype)
+    cube_shape = tuple(dim - 1 for dim in volume.shape)
+    views = [
+        band[dx : dx + cube_shape[0], dy : dy + cube_shape[1], dz : dz + cube_shape[2]]
+        for dx, dy, dz in _CUBE_CORNERS
+    ]
+    low_band = np.minimum.reduce(views)
+    high_band = np.maximum.reduce(views)
+    del views
+    crossed = low_band < high_band
+    cubes = np.argwhere(crossed)
+    low_band = low_band[crossed]
+    high_band = high_band[crossed]
+    del crossed
+
+    flat_volume = volume.reshape(-1)
+    flat_band = band.reshape(-1)
+    for band_index, level_index in enumerate(order):
+        # Sorted level ``band_index`` separates bands at or below it from those above.
+        level_cubes = cubes[(low_band <= band_index) & (high_band > band_index)]
+        if level_cubes.size:
+            surfaces[level_index] = _tetrahedra_surface(
+                flat_volume, flat_band, volume.shape, level_cubes, float(levels[level_index]), band_index
+            )
+    return surfaces
+
+
+def _tetrahedra_surface(
+    flat_volume: np.ndarray,
+    flat_band: np.ndarray,
+    shape: Tuple[int, int, int],
+    cubes: np.ndarray,
+    level: float,
+    band_index: int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    empty = (np.zeros((0, 3), dtype=float), np.zeros((0, 3), dtype=np.int64))
+    strides = np.asarray([shape[1] * shape[2], shape[2], 1], dtype=np.int64)
+    # Global voxel index of each cube corner, shape (cubes, 8).
+    corner_index = (cubes @ strides)[:, np.newaxis] + _CUBE_CORNERS @ strides
+
+    # Tetrahedron corner voxels, shape (tets, 4).
+    tet_index = corner_index[:, _CUBE_TETRAHEDRA].reshape(-1, 4)
+    tet_case = ((flat_band[tet_index] > band_index) * (1 << np.arange(4))).sum(axis=1)
+    triangle_mask = np.arange(2) < _TET_TRIANGLE_COUNTS[tet_case][:, np.newaxis]
+    tet_of_triangle, triangle_slot = np.nonzero(triangle_mask)
+    local_edges = _TET_EDGES[tet_case[tet_of_triangle], triangle_slot]
+    # Edge endpoint voxels, shape (triangles, 3, 2).
+    edge_voxels = np.take_along_axis(
+        tet_index[tet_of_triangle][:, np.newaxis, :], local_edges.reshape(len(local_edges), 1, 6), axis=2
+    ).reshape(-1, 3, 2)
+    if edge_voxels.size == 0:
+        return empty
+
+    # One vertex per crossed voxel edge, keyed by its ordered endpoint pair.
+    low_voxel = edge_voxels.min(axis=2)
+    high_voxel = edge_voxels.max(axis=2)
+    edge_keys = low_voxel * flat_volume.size + high_voxel
+    unique_keys, faces = np.unique(edge_keys.reshape(-1), return_inverse=True)
+    faces = faces.reshape(-1, 3)
+    start = unique_keys // flat_volume.size
+    stop = unique_keys % flat_volume.size
+
+    start_value = flat_volume[start].astype(float)
+    stop_value = flat_volume[stop].astype(float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fraction = np.where(stop_value != start_value, (level - start_value) / (stop_value - start_value), 0.5)
+    start_ijk = np.stack(np.unravel_index(start, shape), axis=1).astype(float)
+    stop_ijk = np.stack(np.unravel_index(stop, shape), axis=1).astype(float)
+    vertices = start_ijk + np.clip(fraction, 0.0, 1.0)[:, np.newaxis] * (stop_ijk - start_ijk)
+
+    # The first edge of each triangle runs between an inside and an outside
+    # voxel; flip triangles whose normal points towards the inside end.
+    first_edge = edge_voxels[:, 0]
+    first_inside = flat_band[first_edge[:, 0]] > band_index
+    inside_end = np.where(first_inside, first_edge[:, 0], first_edge[:, 1])
+    outside_end = np.where(first_inside, first_edge[:, 1], first_edge[:, 0])
+    outward = np.stack(np.unravel_index(outside_end, shape), axis=1) - np.stack(
+        np.unravel_index(inside_end, shape), axis=1
+    )
+    corners = vertices[faces]
+    normals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+    flip = np.einsum("ij,ij->i", normals, outward) < 0
+    faces[flip] = faces[flip][:, ::-1]
+
+    # Triangles collapse when the surface passes exactly through a voxel.
+    degenerate = (faces[:, 0] == faces[:, 1]) | (faces[:, 1] == faces[:, 2]) | (faces[:, 0] == faces[:, 2])
+    return vertices, faces[~degenerate]
+
+
+def _vertex_neighbour_mean(vertices: np.ndarray, faces: np.ndarray) -> np.ndarray:
+    source = faces.reshape(-1)
+    target = np.roll(faces, -1, axis=1).reshape(-1)
+    # Use each directed face edge both ways so every neighbour is counted.
+    source, target = np.concatenate((source, target)), np.concatenate((target, source))
+    counts = np.bincount(source, minlength=len(vertices)).astype(float)
+    counts[counts == 0] = 1.0
+    sums = np.stack(
+        [np.bincount(source, weights=vertices[target, axis], minlength=len(vertices)) for axis in range(3)],
+        axis=1,
+    )
+    return sums / counts[:, np.newaxis]
+
+
+def smooth_mesh(
+    vertices: np.ndarray,
+    faces: np.ndarray,
+    iterations: int = 10,
+    factor: float = 0.5,
+) -> np.ndarray:
+    """Return Taubin-smoothed vertices (alternating shrink/inflate Laplacian steps)."""
+
+    vertices = np.asarray(vertices, dtype=float)
+    if iterations <= 0 or len(faces) == 0:
+        return vertices
+    inflate = -(factor + 0.03)
+    for _iteration in range(int(iterations)):
+        for weight in (factor, inflate):
+            vertices = vertices + weight * (_vertex_neighbour_mean(vertices, faces) - vertices)
+    return vertices
+
+
+def decimate_mesh(
+    vertices: np.ndarray,
+    faces: np.ndarray,
+    cell_size: float,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Merge vertices sharing a ``cell_size`` grid cell and drop collapsed faces."""
+
+    if cell_size <= 0 or len(vertices) == 0:
+        return vertices, faces
+
+    cells = np.floor(np.asarray(vertices, dtype=float) / cell_size).astype(np.int64)
+    _unique_cells, cluster = np.unique(cells, axis=0, return_inverse=True)
+    cluster = cluster.reshape(-1)
+    counts = np.bincount(cluster).astype(float)
+    merged = np.stack([np.bincount(cluster, weights=vertices[:, axis]) for axis in range(3)], axis=1)
+    merged /= counts[:, np.newaxis]
+
+    faces = cluster[faces]
+    keep = (faces[:, 0] != faces[:, 1]) & (faces[:, 1] != faces[:, 2]) & (faces[:, 0] != faces[:, 2])
+    faces = faces[keep]
+    # Faces collapsed onto the same vertex triple are kept once.
+    _unique_faces, first = np.unique(np.sort(faces, axis=1), axis=0, return_index=True)
+    return merged, faces[np.sort(first)]
@@ -0,0 +1,59 @@
+"""Tests for the bpy-free DICOM helpers in ``dicom_util``."""
+
+import importlib.util
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+pydicom = pytest.importorskip("pydicom")
+from pydicom.dataset import FileDataset, FileMetaDataset  # noqa: E402
+from pydicom.uid import CTImageStorage, ExplicitVRLittleEndian, generate_uid  # noqa: E402
+
+# The package __init__ needs bpy, so the module is loaded on its own.
+_SPEC = importlib.util.spec_from_file_location("dicom_util", Path(__file__).resolve().parents[1] / "dicom_util.py")
+dicom_util = importlib.util.module_from_spec(_SPEC)
+_SPEC.loader.exec_module(dicom_util)
+
+
+def _write_ct_slice(path: Path, pixels: np.ndarray, bits_stored: int, signed: bool) -> Path:
+    file_meta = FileMetaDataset()
+    file_meta.MediaStorageSOPClassUID = CTImageStorage
+    file_meta.MediaStorageSOPInstanceUID = generate_uid()
+    file_meta.TransferSyntaxUID = ExplicitVRLittleEndian
+
+    dataset = FileDataset(str(path), {}, file_meta=file_meta, preamble=b"\0" * 128)
+    dataset.Modality = "CT"
+    dataset.SOPClassUID = CTImageStorage
+    dataset.SOPInstanceUID = file_meta.MediaStorageSOPInstanceUID
+    dataset.SamplesPerPixel = 1
+    dataset.PhotometricInterpretation = "MONOCHROME2"
+    dataset.Rows, dataset.Columns = pixels.shape
+    dataset.BitsAllocated = 16
+    dataset.BitsStored = bits_stored
+    dataset.HighBit = bits_stored - 1
+    dataset.PixelRepresentation = int(signed)
+    dataset.PixelData = pixels.astype("<i2" if signed else "<u2").tobytes()
+    dataset.save_as(path, enforce_file_format=True)
+    return path
+
+
+@pytest.mark.parametrize("signed", [False, True])
+def test_map_pixel_data_skips_partially_stored_words(tmp_path, signed):
+    # 0xF123 carries garbage above bit 11; pixel_array masks it to 0x123.
+    raw = np.full((2, 3), 0xF123, dtype=np.uint16).view(np.int16 if signed else np.uint16)
+    path = _write_ct_slice(tmp_path / "slice.dcm", raw, bits_stored=12, signed=signed)
+
+    header = dicom_util.read_dicom_header(path, specific_tags=None)
+    assert header.pixel_data_offset is not None
+    assert dicom_util.map_pixel_data(header) is None
+    assert np.all(pydicom.dcmread(path).pixel_array == 0x123)
+
+
+def test_map_pixel_data_matches_pixel_array(tmp_path):
+    pixels = np.arange(12, dtype=np.uint16).reshape(3, 4) * 1000
+    path = _write_ct_slice(tmp_path / "slice.dcm", pixels, bits_stored=16, signed=False)
+
+    mapped = dicom_util.map_pixel_data(dicom_util.read_dicom_header(path, specific_tags=None))
+    assert mapped is not None
+    np.testing.assert_array_equal(mapped, pydicom.dcmread(path).pixel_array)
@@ -3,12 +3,14 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Optional, Sequence, Tuple
+from typing import Iterable, Optional, Sequence, Tuple
 
 import bpy
 import numpy as np
 from mathutils import Matrix
 
+from .dicom_index import INDEX_FILE_NAME
+from .resample import downsample_blocks
 from .ui_utils import show_message_box
 
 
@@ -64,6 +66,15 @@ def resolve_temp_path(target_name: str, base_dir: Optional[Path] = None) -> Path
     return base_dir / target_name
 
 
+def resolve_dicom_index_path() -> Optional[Path]:
+    """Return the DICOM header index location, next to the temporary VDB files."""
+
+    try:
+        return resolve_temp_path(INDEX_FILE_NAME)
+    except Exception:
+        return None
+
+
 def _link_object_to_context_collection(obj: bpy.types.Object) -> None:
     collection = bpy.context.collection or bpy.context.scene.collection
     collection.objects.link(obj)
@@ -136,17 +147,30 @@ def align_object_to_ct_frame(
     return True
 
 
-def _import_volume_data_api(output_path: Path) -> bpy.types.Object:
+def _import_volume_data_api(
+    output_path: Path,
+    collection: Optional[bpy.types.Collection] = None,
+) -> bpy.types.Object:
     """Import a VDB file using Blender data API to avoid context-sensitive operators."""
 
     volume_data = bpy.data.volumes.load(str(output_path))
     obj = bpy.data.objects.new(output_path.stem, volume_data)
-    _link_object_to_context_collection(obj)
+    if collection is not None:
+        collection.objects.link(obj)
+    else:
+        _link_object_to_context_collection(obj)
     return obj
 
 
-def _import_volume_operator_fallback(output_path: Path) -> bpy.types.Object:
-    """Fallback for Blender builds where data API loading is unavailable."""
+def _import_volume_operator_fallback(
+    output_path: Path,
+    collection: Optional[bpy.types.Collection] = None,
+) -> bpy.types.Object:
+    """Fallback for Blender builds where data API loading is unavailable.
+
+    The operator links into the active collection; with ``collection`` the
+    object is moved there instead.
+    """
 
     before_names = {obj.name for obj in bpy.data.objects}
     result = bpy.ops.object.volume_import(
@@ -157,15 +181,21 @@ def _import_volume_operator_fallback(output_path: Path) -> bpy.types.Object:
     if "FINISHED" not in result:
         raise RuntimeError("Volume import operator did not finish successfully")
 
-    active_obj = bpy.context.view_layer.objects.active
-    if active_obj and active_obj.name not in before_names:
-        return active_obj
+    imported_obj = bpy.context.view_layer.objects.active
+    if not imported_obj or imported_obj.name in before_names:
+        # Fall back to matching by object type and expected base name.
+        candidates = [obj for obj in bpy.data.objects if obj.name not in before_names and obj.type == "VOLUME"]
+        if not candidates:
+            raise RuntimeError("Unable to resolve imported volume object from operator fallback")
+        imported_obj = candidates[-1]
 
-    # Fall back to matching by object type and expected base name.
-    candidates = [obj for obj in bpy.data.objects if obj.name not in before_names and obj.type == "VOLUME"]
-    if candidates:
-        return candidates[-1]
-    raise RuntimeError("Unable to resolve imported volume object from operator fallback")
+    if collection is not None:
+        for user_collection in list(imported_obj.users_collection):
+            if user_collection != collection:
+                user_collection.objects.unlink(imported_obj)
+        if collection not in imported_obj.users_collection:
+            collection.objects.link(imported_obj)
+    return imported_obj
 
 
 def _import_openvdb_module():
@@ -182,12 +212,215 @@ def _import_openvdb_module():
     ) from last_exc
 
 
+def read_vdb_grid(obj: bpy.types.Object, shape: Sequence[int], grid_name: str = "density") -> np.ndarray:
+    """Read a grid of an imported volume's full resolution VDB file back into a dense float32 array."""
+
+    openvdb = _import_openvdb_module()
+    lod_paths = obj.get("medblend_lod_paths")
+    file_path = lod_paths[0] if lod_paths else bpy.path.abspath(obj.data.filepath)
+    grid = openvdb.read(str(file_path), grid_name)
+    array = np.full(tuple(int(value) for value in shape), grid.background, dtype=np.float32)
+    grid.copyToArray(array, ijk=(0, 0, 0))
+    return array
+
+
+# Planes converted to float32 per copyFromArray call when a slab needs conversion.
+_WRITE_CHUNK_PLANES = 32
+
+
+def lod_path(output_path: Path, level: int) -> Path:
+    """Return the VDB path used for mip ``level`` of ``output_path`` (0 is full resolution)."""
+
+    if level <= 0:
+        return output_path
+    return output_path.with_name(f"{output_path.stem}_lod{level}{output_path.suffix}")
+
+
+def set_viewport_lod(obj: bpy.types.Object, level: int) -> bool:
+    """Point ``obj``'s volume at mip ``level`` (clamped to the levels written on import)."""
+
+    lod_paths = obj.get("medblend_lod_paths")
+    if not lod_paths or not hasattr(obj.data, "filepath"):
+        return False
+
+    level = max(0, min(int(level), len(lod_paths) - 1))
+    obj["medblend_viewport_lod"] = level
+    if obj.data.filepath != lod_paths[level]:
+        obj.data.filepath = lod_paths[level]
+    return True
+
+
+def _lod_objects():
+    return [obj for obj in bpy.data.objects if obj.get("medblend_lod_paths") and obj.type == "VOLUME"]
+
+
+@bpy.app.handlers.persistent
+def use_render_lods(*_args) -> None:
+    """Render handler: switch every multi-resolution volume to full resolution."""
+
+    for obj in _lod_objects():
+        lod_paths = obj["medblend_lod_paths"]
+        if obj.data.filepath != lod_paths[0]:
+            obj.data.filepath = lod_paths[0]
+
+
+@bpy.app.handlers.persistent
+def restore_viewport_lods(*_args) -> None:
+    """Render handler: restore each volume's chosen viewport level after rendering."""
+
+    for obj in _lod_objects():
+        set_viewport_lod(obj, obj.get("medblend_viewport_lod", 0))
+
+
+def _occupied_bounds(slab: np.ndarray, background: float, tolerance: float):
+    """Return index slices bounding voxels further than ``tolerance`` from ``background``, or ``None``."""
+
+    occupied = np.abs(slab - np.asarray(background, dtype=np.float32)) > tolerance
+    planes = np.flatnonzero(occupied.reshape(occupied.shape[0], -1).any(axis=1))
+    if planes.size == 0:
+        return None
+    footprint = occupied[planes[0] : planes[-1] + 1].any(axis=0)
+    rows = np.flatnonzero(footprint.any(axis=1))
+    cols = np.flatnonzero(footprint.any(axis=0))
+    return (
+        slice(int(planes[0]), int(planes[-1]) + 1),
+        slice(int(rows[0]), int(rows[-1]) + 1),
+        slice(int(cols[0]), int(cols[-1]) + 1),
+    )
+
+
+def _copy_slab(
+    grid,
+    slab: np.ndarray,
+    first_ijk: Tuple[int, int, int],
+    value_scale: float,
+    background: Optional[float] = None,
+    tolerance: float = 0.0,
+) -> None:
+    ijk = tuple(int(value) for value in first_ijk)
+    copy_options = {}
+    if background is not None:
+        # Only the occupied box is copied; its corner becomes the ijk offset,
+        # so the grid transform stays that of the full frame.
+        bounds = _occupied_bounds(slab, background / value_scale, tolerance / value_scale)
+        if bounds is None:
+            return
+        slab = slab[bounds]
+        ijk = (ijk[0] + bounds[0].start, bounds[1].start, bounds[2].start)
+        copy_options["tolerance"] = float(tolerance)
+
+    if slab.dtype == np.float32 and value_scale == 1.0:
+        # FloatGrid stores float32; matching arrays are passed through uncopied.
+        grid.copyFromArray(np.ascontiguousarray(slab), ijk=ijk, **copy_options)
+        return
+
+    for start in range(0, slab.shape[0], _WRITE_CHUNK_PLANES):
+        chunk = np.multiply(slab[start : start + _WRITE_CHUNK_PLANES], value_scale, dtype=np.float32)
+        grid.copyFromArray(chunk, ijk=(ijk[0] + start, ijk[1], ijk[2]), **copy_options)
+
+
 def write_vdb_volume(
     array,
     spacing: Sequence[float],
     target_name: str,
     dicom_dir: Optional[Path] = None,
+    value_scale: float = 1.0,
+    half_float: bool = False,
+    lod_levels: int = 0,
+    lod_reduce: str = "mean",
+    viewport_lod: Optional[int] = None,
+    background: Optional[float] = None,
+    tolerance: float = 0.0,
+    collection: Optional[bpy.types.Collection] = None,
+) -> Optional[Tuple[Path, bpy.types.Object]]:
+    return write_vdb_volume_slabs(
+        ((0, array),),
+        spacing,
+        target_name,
+        dicom_dir,
+        value_scale,
+        half_float,
+        lod_levels,
+        lod_reduce,
+        viewport_lod,
+        background,
+        tolerance,
+        collection,
+    )
+
+
+def write_vdb_volume_slabs(
+    slabs: Iterable[Tuple[int, np.ndarray]],
+    spacing: Sequence[float],
+    target_name: str,
+    dicom_dir: Optional[Path] = None,
+    value_scale: float = 1.0,
+    half_float: bool = False,
+    lod_levels: int = 0,
+    lod_reduce: str = "mean",
+    viewport_lod: Optional[int] = None,
+    background: Optional[float] = None,
+    tolerance: float = 0.0,
+    collection: Optional[bpy.types.Collection] = None,
+) -> Optional[Tuple[Path, bpy.types.Object]]:
+    """Write ``(first_index, slab)`` pairs along axis 0 into a single VDB grid.
+
+    Slabs are consumed one at a time, so a generator keeps peak array memory
+    bounded by the slab size rather than the full volume. Compact slabs (e.g.
+    ``uint8``) are converted to float32 a few planes at a time and multiplied
+    by ``value_scale``. ``half_float`` stores the grid as 16-bit floats on disk.
+
+    ``lod_levels`` additionally writes 1/2, 1/4, ... resolution copies built
+    by 2x2x2 ``lod_reduce`` ("mean" or "max") next to the full file. Slab
+    offsets must then be multiples of ``2 ** lod_levels``. The viewport shows
+    ``viewport_lod`` (default: the coarsest level) and renders switch to full
+    resolution through :func:`use_render_lods`.
+
+    With ``background`` the grid is written sparse: voxels within
+    ``tolerance`` of the background (both in written units, i.e. after
+    ``value_scale``) stay inactive, and each slab is cropped to its occupied
+    bounding box before copying.
+    """
+
+    return write_vdb_grids(
+        (("density", slabs),),
+        spacing,
+        target_name,
+        dicom_dir,
+        value_scale,
+        half_float,
+        lod_levels,
+        lod_reduce,
+        viewport_lod,
+        background,
+        tolerance,
+        collection,
+    )
+
+
+def write_vdb_grids(
+    named_slabs: Iterable[Tuple[str, Iterable[Tuple[int, np.ndarray]]]],
+    spacing: Sequence[float],
+    target_name: str,
+    dicom_dir: Optional[Path] = None,
+    value_scale: float = 1.0,
+    half_float: bool = False,
+    lod_levels: int = 0,
+    lod_reduce: str = "mean",
+    viewport_lod: Optional[int] = None,
+    background: Optional[float] = None,
+    tolerance: float = 0.0,
+    collection: Optional[bpy.types.Collection] = None,
 ) -> Optional[Tuple[Path, bpy.types.Object]]:
+    """Write ``(grid_name, slabs)`` pairs as named grids of one VDB file and volume object.
+
+    Every grid shares ``spacing`` and the options of
+    :func:`write_vdb_volume_slabs`. A slab's ``first_index`` may also be a
+    full ``(i, j, k)`` offset, placing cropped arrays within a shared frame.
+    The object is linked to ``collection`` when given, otherwise to the
+    active collection and made active.
+    """
+
     if len(spacing) != 3:
         show_message_box(
             f"Expected 3 spacing values (x, y, z), got {len(spacing)}.",
@@ -210,26 +443,54 @@ def write_vdb_volume(
         return None
 
     try:
-        grid = openvdb.FloatGrid()
-        grid.copyFromArray(array.astype(float))
-        grid.transform = openvdb.createLinearTransform(
-            [
-                [spacing[0] / 1000.0, 0, 0, 0],
-                [0, spacing[1] / 1000.0, 0, 0],
-                [0, 0, spacing[2] / 1000.0, 0],
-                [0, 0, 0, 1],
-            ]
-        )
-        grid.gridClass = openvdb.GridClass.FOG_VOLUME
-        grid.name = "density"
+        lod_levels = max(0, int(lod_levels))
+        grid_args = () if background is None else (float(background),)
+        level_grids = [[] for _level in range(lod_levels + 1)]
+        for grid_name, slabs in named_slabs:
+            grids = [openvdb.FloatGrid(*grid_args) for _level in range(lod_levels + 1)]
+            for first_index, slab in slabs:
+                first_ijk = tuple(first_index) if isinstance(first_index, tuple) else (first_index, 0, 0)
+                level_slab = slab
+                for level, grid in enumerate(grids):
+                    if level:
+                        if any(value % (1 << level) for value in first_ijk):
+                            raise ValueError(f"Slab offset {first_ijk} is not a multiple of {1 << level}")
+                        level_slab = downsample_blocks(level_slab, lod_reduce)
+                    level_ijk = tuple(value >> level for value in first_ijk)
+                    _copy_slab(grid, level_slab, level_ijk, value_scale, background, tolerance)
+                del slab, level_slab
+
+            for level, grid in enumerate(grids):
+                factor = float(1 << level)
+                # Coarse voxel centres sit midway between the fine voxels they cover.
+                offset = (factor - 1.0) / 2.0
+                grid.transform = openvdb.createLinearTransform(
+                    [
+                        [factor * spacing[0] / 1000.0, 0, 0, 0],
+                        [0, factor * spacing[1] / 1000.0, 0, 0],
+                        [0, 0, factor * spacing[2] / 1000.0, 0],
+                        [offset * spacing[0] / 1000.0, offset * spacing[1] / 1000.0, offset * spacing[2] / 1000.0, 1],
+                    ]
+                )
+                grid.gridClass = openvdb.GridClass.FOG_VOLUME
+                grid.name = grid_name
+                if half_float:
+                    grid.saveFloatAsHalf = True
+                level_grids[level].append(grid)
 
         output_path = resolve_temp_path(target_name, dicom_dir)
-        openvdb.write(str(output_path), grid)
+        for level, grids in enumerate(level_grids):
+            openvdb.write(str(lod_path(output_path, level)), grids)
+        del level_grids
 
         try:
-            imported_obj = _import_volume_data_api(output_path)
+            imported_obj = _import_volume_data_api(output_path, collection)
         except Exception:
-            imported_obj = _import_volume_operator_fallback(output_path)
+            imported_obj = _import_volume_operator_fallback(output_path, collection)
+
+        if lod_levels:
+            imported_obj["medblend_lod_paths"] = [str(lod_path(output_path, level)) for level in range(lod_levels + 1)]
+            set_viewport_lod(imported_obj, lod_levels if viewport_lod is None else viewport_lod)
 
         return output_path, imported_obj
     except Exception as exc: